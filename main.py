@@ -1,10 +1,23 @@
+import os
 import sys
 from PyQt5.QtWidgets import QApplication
-from ui.main_window import ChatBotUI
+from ui.theme import apply_stylesheet
+from ui.watchdog import StallWatchdog
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setStyle("Fusion")  # Use modern style
+    apply_stylesheet(app)
+
+    # Opt-in UI freeze logging: --watchdog or CHATBOT_WATCHDOG=1
+    watchdog = None
+    if "--watchdog" in sys.argv or os.environ.get("CHATBOT_WATCHDOG") == "1":
+        threshold_ms = int(os.environ.get("CHATBOT_WATCHDOG_THRESHOLD_MS", "500"))
+        watchdog = StallWatchdog(threshold=threshold_ms / 1000)
+        watchdog.start()
+
+    # Imported after the watchdog starts so the slow torch import is logged too
+    from ui.main_window import ChatBotUI
 
     window = ChatBotUI()
     window.show()
@@ -1,60 +1,411 @@
-from openai import OpenAI
+from openai import (OpenAI, APIConnectionError, APIStatusError,
+                    AuthenticationError, PermissionDeniedError, Stream)
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+import hashlib
+import inspect
+import json
 import os
+import threading
 import time
 
+from models.messages import MessageHistory
+from models.single_flight import SingleFlight
+from models.hedging import HedgeBudget, open_hedged, open_cancellable
+from models.usage_ledger import QuotaExceededError
+
+# Deepseek API端点，可以用 DEEPSEEK_BASE_URL 环境变量指向其他兼容OpenAI的服务
+DEFAULT_BASE_URL = "https://api.deepseek.com/v1"
+
+# 较新的 openai SDK 的 client.post() 接受 content 参数，可以直接发送编码好的请求体；
+# 旧版本只接受由SDK自己编码的 body
+_SEND_ENCODED_BODY = "content" in inspect.signature(OpenAI.post).parameters
+
+
+def resolve_base_url(base_url=None):
+    """实际使用的API端点"""
+    return base_url or os.environ.get("DEEPSEEK_BASE_URL") or DEFAULT_BASE_URL
+
+
+# 按 (API密钥, 端点) 共享的客户端。所有对话共用一个连接池，预热建立的连接
+# 和加载过的证书都能直接复用，新建对话也不用再创建客户端
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, base_url):
+    """密钥和端点对应的共享客户端"""
+    with _clients_lock:
+        client = _clients.get((api_key, base_url))
+        if client is None:
+            client = _clients[(api_key, base_url)] = OpenAI(api_key=api_key, base_url=base_url)
+        return client
+
+
+def warm_up(api_key, base_url=None, timeout=10):
+    """解析并连接API端点，用列出模型这个不计费的请求验证密钥
+
+    连接留在共享客户端的连接池里，随后的第一条消息不必再等DNS和TLS握手。
+    返回 (状态, 说明)，状态为 "valid"、"invalid"（密钥被拒绝）或
+    "unreachable"（网络不可用，密钥是否有效未知）。
+    """
+    client = get_client(api_key, resolve_base_url(base_url))
+    start = time.perf_counter()
+    try:
+        # 同一个连接池，只是不重试，失败时尽快报告
+        client.with_options(timeout=timeout, max_retries=0).models.list()
+    except (AuthenticationError, PermissionDeniedError) as e:
+        return "invalid", f"API密钥被拒绝（HTTP {e.status_code}）"
+    except APIStatusError as e:
+        # 其他兼容服务可能没有模型列表，但端点可达且没有拒绝密钥
+        return "valid", f"已连接（HTTP {e.status_code}）"
+    except (APIConnectionError, OSError) as e:
+        return "unreachable", f"无法连接API: {e}"
+    return "valid", f"已连接，密钥有效（{(time.perf_counter() - start) * 1000:.0f} 毫秒）"
+
+
+# 被中断的回复在历史记录中的标记
+TRUNCATED_MARKER = "[回复已中断]"
+
+# 固定的系统提示词。不要加入时间戳等可变内容，否则每轮对话的前缀都会变化，
+# 无法命中Deepseek的上下文缓存
+SYSTEM_PROMPT = "你是一个乐于助人的AI助手。"
+
 
 class DS_Bot:
-    def __init__(self, api_key=None, model="deepseek-chat", temperature=0.7, max_tokens=1000):
+    # 所有实例共享，合并不同对话中同时进行的相同请求
+    in_flight = SingleFlight()
+    # 所有实例共享的对冲预算：对冲请求最多占全部请求的5%，另有3次初始额度，
+    # 可以用 DEEPSEEK_HEDGE_BUDGET_PERCENT 与 DEEPSEEK_HEDGE_BURST 调整
+    hedge_budget = HedgeBudget(
+        max_ratio=float(os.environ.get("DEEPSEEK_HEDGE_BUDGET_PERCENT", "5")) / 100,
+        burst=int(os.environ.get("DEEPSEEK_HEDGE_BURST", "3"))
+    )
+
+    def __init__(self, api_key=None, model="deepseek-chat", temperature=0.7, max_tokens=1000,
+                 system_prompt=SYSTEM_PROMPT, base_url=None,
+                 hedge_model=None, hedge_base_url=None, hedge_delay=None, hedge_budget=None,
+                 semantic_cache=None, usage_ledger=None, username=""):
 
         self.api_key = api_key or os.environ.get("DEEPSEEK_API_KEY")
         if not self.api_key:
             raise ValueError("API密钥必须提供或设置为DEEPSEEK_API_KEY环境变量")
 
         # Deepseek API使用OpenAI的客户端与基本URL
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url="https://api.deepseek.com/v1"  # Deepseek API端点
-        )
+        self.base_url = resolve_base_url(base_url)
+        self.client = get_client(self.api_key, self.base_url)
+
+        # 对冲：首个令牌迟迟未到时向备用模型或端点再发一次请求，取先返回的一方
+        self.hedge_model = hedge_model or os.environ.get("DEEPSEEK_HEDGE_MODEL")
+        self.hedge_base_url = hedge_base_url or os.environ.get("DEEPSEEK_HEDGE_BASE_URL")
+        if hedge_delay is None:
+            hedge_delay = float(os.environ.get("DEEPSEEK_HEDGE_DELAY_MS", "2000")) / 1000
+        self.hedge_delay = hedge_delay
+        if hedge_budget is not None:
+            # 不与其他实例共享的预算（models.hedging.HedgeBudget）
+            self.hedge_budget = hedge_budget
+        self.hedge_client = None
+        if self.hedge_model or self.hedge_base_url:
+            self.hedge_client = get_client(self.api_key, self.hedge_base_url or self.base_url)
+
+        # 单轮问题的答案缓存（models.semantic_cache.SemanticCache），可以在多个实例间共享
+        self.semantic_cache = semantic_cache
+
+        # 按用户累计令牌用量并检查配额（models.usage_ledger.UsageLedger）
+        self.usage_ledger = usage_ledger
+        self.username = username
 
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
-        self.conversation_history = []
+        self.system_prompt = system_prompt
+        self.conversation_history = MessageHistory()
+        # 每次请求的令牌用量，用于统计上下文缓存命中率
+        self.usage_history = []
+        self.clear_history()
+
+        # 请求取消状态，cancel() 可以从其他线程调用
+        self.last_truncated = False
+        self.last_error = None
+        self.last_cached = False
+        self._cancel_event = threading.Event()
+        self._active_stream = None
+        self._active_flight = None
+        self._stream_lock = threading.Lock()
+
+    def set_api_key(self, api_key):
+        """更换API密钥，保留对话历史
+
+        客户端由所有对话共享，不能原地改密钥，改用新密钥对应的共享客户端，
+        它的连接通常已经由 warm_up() 建立好了。
+        """
+        self.api_key = api_key
+        self.client = get_client(api_key, self.base_url)
+        if self.hedge_client:
+            self.hedge_client = get_client(api_key, self.hedge_base_url or self.base_url)
 
     def add_message(self, role, content):
-        """向对话历史添加消息"""
-        self.conversation_history.append({"role": role, "content": content})
+        """向对话历史添加消息
+
+        历史记录只追加、不改写，保证每轮请求的消息前缀逐字节一致。
+        """
+        self.conversation_history.append(role, content)
+
+    def _record_usage(self, usage):
+        """记录一次请求的令牌用量"""
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        cache_hit_tokens = getattr(usage, "prompt_cache_hit_tokens", None)
+        if cache_hit_tokens is None:
+            # OpenAI兼容格式
+            details = getattr(usage, "prompt_tokens_details", None)
+            cache_hit_tokens = getattr(details, "cached_tokens", 0) if details else 0
+        record = {
+            "prompt_tokens": prompt_tokens,
+            "cache_hit_tokens": cache_hit_tokens or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        }
+        self.usage_history.append(record)
+        if self.usage_ledger:
+            self.usage_ledger.record(self.username, self.model, record["prompt_tokens"],
+                                     record["cache_hit_tokens"], record["completion_tokens"])
+        return record
+
+    def cache_hit_ratio(self):
+        """当前对话中提示词令牌命中上下文缓存的比例"""
+        prompt_tokens = sum(u["prompt_tokens"] for u in self.usage_history)
+        if not prompt_tokens:
+            return 0.0
+        return sum(u["cache_hit_tokens"] for u in self.usage_history) / prompt_tokens
+
+    def usage_summary(self):
+        """当前对话的令牌用量汇总"""
+        return {
+            "requests": len(self.usage_history),
+            "prompt_tokens": sum(u["prompt_tokens"] for u in self.usage_history),
+            "cache_hit_tokens": sum(u["cache_hit_tokens"] for u in self.usage_history),
+            "completion_tokens": sum(u["completion_tokens"] for u in self.usage_history),
+            "cache_hit_ratio": self.cache_hit_ratio(),
+        }
 
-    def get_response(self, user_input, stream=False):
-        """获取Deepseek API对用户输入的响应"""
+    def get_response(self, user_input, stream=False, on_chunk=None):
+        """获取Deepseek API对用户输入的响应
+
+        流式模式下每个内容片段会传给 on_chunk（未提供时打印到控制台）。
+        """
         # 检查是否是命令
         if user_input.startswith("/"):
             return self.handle_command(user_input)
 
+        self.last_cached = False
+        # 只有对话的第一个问题与上下文无关，才能使用问题缓存
+        cache = self.semantic_cache
+        if cache is None or any(message.role != "system" for message in self.conversation_history):
+            return self._request(user_input, stream, on_chunk)
+
+        cached = cache.lookup(user_input, self.cache_namespace())
+        if cached is not None:
+            return self._serve_cached(user_input, cached, stream, on_chunk)
+
+        response = self._request(user_input, stream, on_chunk)
+        if self.last_error is None and not self.last_truncated and response:
+            cache.add(user_input, response, self.cache_namespace())
+        return response
+
+    def cache_namespace(self):
+        """模型或系统提示词不同的答案不能互相替代"""
+        return f"{self.model}\n{self.system_prompt}"
+
+    def _serve_cached(self, user_input, answer, stream, on_chunk):
+        """直接返回缓存的答案，同样写入历史记录，后续追问仍有上下文"""
+        self.last_truncated = False
+        self.last_error = None
+        self.last_cached = True
+        self.add_message("user", user_input)
+        self.add_message("assistant", answer)
+        if stream:
+            if on_chunk:
+                on_chunk(answer)
+            else:
+                print(answer)
+        return answer
+
+    def _request(self, user_input, stream, on_chunk):
+        """把用户消息发送给Deepseek API"""
+        # 配额只读内存中的计数，不会拖慢发送
+        if self.usage_ledger:
+            try:
+                self.usage_ledger.check_quota(self.username)
+            except QuotaExceededError as e:
+                self.last_truncated = False
+                self.last_error = e
+                return f"无法发送: {e}"
+
         # 添加用户消息到历史记录
         self.add_message("user", user_input)
+        self.last_truncated = False
+        self.last_error = None
+        self._cancel_event.clear()
+
+        # 消息列表只编码一次，指纹和请求体共用
+        messages_json = self.conversation_history.payload_json()
 
+        # 其他对话正在发送完全相同的请求时，直接订阅它的结果
+        key = self.request_fingerprint(messages_json)
+        flight, is_leader = self.in_flight.join(key)
+        if not is_leader:
+            return self._follow_flight(flight, stream, on_chunk)
+
+        with self._stream_lock:
+            self._active_flight = flight
         try:
+            body = self._request_body(self.model, stream, messages_json)
+
             # 调用Deepseek API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=self.conversation_history,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                stream=stream
-            )
+            if stream and self.hedge_client:
+                response = self._open_hedged_stream(body, stream, messages_json)
+            elif stream:
+                # 连接和等待首个令牌期间也能取消，除非还有其他对话在订阅这个请求
+                response = open_cancellable(
+                    lambda: self._create_completion(self.client, body, stream),
+                    lambda: self._cancel_event.is_set() and not flight.followers
+                )
+            else:
+                response = self._create_completion(self.client, body, stream)
 
             if stream:
-                return self._handle_streaming(response)
+                return self._handle_streaming(response, on_chunk, flight)
             else:
+                if response.usage:
+                    self._record_usage(response.usage)
                 assistant_message = response.choices[0].message.content
+                flight.publish(assistant_message)
                 self.add_message("assistant", assistant_message)
                 return assistant_message
 
         except Exception as e:
+            flight.error = e
+            self.last_error = e
+            # 撤销没有得到回复的用户消息，之后可以原样重新发送
+            self.conversation_history.pop()
             error_msg = f"调用Deepseek API时出错: {str(e)}"
             print(error_msg)
             return error_msg
+        finally:
+            with self._stream_lock:
+                self._active_flight = None
+            self.in_flight.finish(key, flight)
+
+    def _request_body(self, model, stream, messages_json):
+        """聊天补全请求体
+
+        SDK 会把整个消息列表重新序列化一遍，这里直接拼接历史记录缓存的
+        JSON编码，只有少量请求参数需要重新编码
+        """
+        params = {
+            "model": model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stream": stream,
+        }
+        if stream:
+            # 流式响应的最后一个片段附带用量信息
+            params["stream_options"] = {"include_usage": True}
+        head = json.dumps(params, ensure_ascii=False, separators=(",", ":"))
+        return (head[:-1] + ',"messages":' + messages_json + "}").encode()
+
+    @staticmethod
+    def _create_completion(client, body, stream):
+        """发送编码好的请求体，返回值与 chat.completions.create 相同
+
+        SDK 不支持 client.post(content=...) 时，解码后交给
+        chat.completions.create，由SDK重新编码整个请求。
+        """
+        if not _SEND_ENCODED_BODY:
+            return client.chat.completions.create(**json.loads(body))
+        return client.post(
+            "/chat/completions",
+            content=body,
+            cast_to=ChatCompletion,
+            stream=stream,
+            stream_cls=Stream[ChatCompletionChunk]
+        )
+
+    def _open_hedged_stream(self, body, stream, messages_json):
+        """打开流式请求，首个令牌超时后向备用模型/端点发出对冲请求"""
+        hedge_body = self._request_body(self.hedge_model or self.model, stream, messages_json)
+        return open_hedged(
+            lambda: self._create_completion(self.client, body, stream),
+            lambda: self._create_completion(self.hedge_client, hedge_body, stream),
+            self.hedge_delay,
+            self.hedge_budget,
+            self._cancel_event
+        )
+
+    def _hedge_summary(self):
+        if not self.hedge_client:
+            return ""
+        stats = self.hedge_budget.stats()
+        return (f"\n对冲请求（全部对话）: {stats['hedges_sent']}/{stats['requests']} "
+                f"({stats['hedge_ratio']:.1%})，对冲获胜 {stats['hedge_wins']} 次，"
+                f"因预算跳过 {stats['denied']} 次")
+
+    def _ledger_summary(self):
+        if not self.usage_ledger:
+            return ""
+        month = self.usage_ledger.month_summary(self.username)
+        summary = f"\n本月用量: {month['tokens']} 令牌，约 ${month['cost']:.4f}"
+        if month["quota_tokens"] is not None:
+            summary += f"\n令牌配额: {month['quota_tokens']}"
+        if month["quota_cost"] is not None:
+            summary += f"\n费用配额: ${month['quota_cost']:.2f}"
+        return summary
+
+    def _semantic_cache_summary(self):
+        if not self.semantic_cache:
+            return ""
+        stats = self.semantic_cache.stats()
+        return (f"\n问题缓存（全部对话）: {stats['entries']} 条，"
+                f"命中 {stats['hits']}/{stats['hits'] + stats['misses']} ({stats['hit_ratio']:.1%})")
+
+    def request_fingerprint(self, messages_json=None):
+        """请求指纹：端点、模型参数与完整消息列表都相同的请求才会被合并"""
+        if messages_json is None:
+            messages_json = self.conversation_history.payload_json()
+        digest = hashlib.sha256()
+        digest.update(f"{self.base_url}\n{self.model}\n{self.temperature}\n{self.max_tokens}\n".encode())
+        digest.update(messages_json.encode())
+        return digest.hexdigest()
+
+    def _follow_flight(self, flight, stream, on_chunk):
+        """订阅相同请求的输出，不再发起网络调用"""
+        collected_content = ""
+        try:
+            for content_chunk in flight.subscribe(self._cancel_event):
+                if self._cancel_event.is_set():
+                    break
+                collected_content += content_chunk
+                if stream:
+                    if on_chunk:
+                        on_chunk(content_chunk)
+                    else:
+                        print(content_chunk, end="", flush=True)
+        finally:
+            flight.leave()
+
+        if stream and not on_chunk:
+            print()  # 最后的换行
+
+        if flight.error is not None and not self._cancel_event.is_set():
+            self.last_error = flight.error
+            self.conversation_history.pop()
+            return f"调用Deepseek API时出错: {str(flight.error)}"
+
+        if self._cancel_event.is_set() or flight.truncated:
+            self.last_truncated = True
+            truncated = f"{collected_content}\n{TRUNCATED_MARKER}" if collected_content else TRUNCATED_MARKER
+            self.add_message("assistant", truncated)
+        else:
+            self.add_message("assistant", collected_content)
+        return collected_content
 
     def handle_command(self, command):
         cmd = command.lower().strip()
@@ -67,6 +418,7 @@ class DS_Bot:
                     "/restart - 重新开始对话\n"
                     "/mode - 显示当前模式\n"
                     "/model - 显示当前使用的模型\n"
+                    "/usage - 显示令牌用量与缓存命中率\n"
                     "/image - 生成图像描述（仅高级模式）")
         elif cmd == "/clear" or cmd == "/restart":
             self.clear_history()
@@ -75,6 +427,15 @@ class DS_Bot:
             return "当前使用的是高级模式，拥有完整的AI功能。"
         elif cmd == "/model":
             return f"当前使用的模型: {self.model}"
+        elif cmd == "/usage":
+            summary = self.usage_summary()
+            return (f"请求次数: {summary['requests']}\n"
+                    f"提示词令牌: {summary['prompt_tokens']}（缓存命中 {summary['cache_hit_tokens']}）\n"
+                    f"回复令牌: {summary['completion_tokens']}\n"
+                    f"缓存命中率: {summary['cache_hit_ratio']:.1%}\n"
+                    f"合并的重复请求（全部对话）: {self.in_flight.stats()['calls_saved']}"
+                    + self._hedge_summary() + self._semantic_cache_summary()
+                    + self._ledger_summary())
         elif cmd.startswith("/image"):
             try:
                 # 简单的图像描述生成
@@ -85,22 +446,88 @@ class DS_Bot:
         else:
             return f"未知命令: {command}。输入 /help 获取可用命令列表。"
 
-    def _handle_streaming(self, response_stream):
+    def _handle_streaming(self, response_stream, on_chunk=None, flight=None):
         """处理流式响应"""
         collected_content = ""
-        for chunk in response_stream:
-            if chunk.choices[0].delta.content:
-                content_chunk = chunk.choices[0].delta.content
-                collected_content += content_chunk
-                print(content_chunk, end="", flush=True)
+        # 被取消时本对话已经收到的内容
+        delivered_content = None
+        # 在上游结束前停止了读取
+        stopped_early = False
+        with self._stream_lock:
+            self._active_stream = response_stream
+        try:
+            # 在建立连接期间已被取消
+            if self._cancel_event.is_set() and not (flight and flight.followers):
+                response_stream.close()
+
+            for chunk in response_stream:
+                if self._cancel_event.is_set():
+                    if delivered_content is None:
+                        delivered_content = collected_content
+                    # 还有其他对话在订阅时继续读取，只是不再输出到本对话，
+                    # 订阅方全部离开后立即停止
+                    if not (flight and flight.followers):
+                        stopped_early = True
+                        break
+                if getattr(chunk, "usage", None):
+                    self._record_usage(chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    content_chunk = chunk.choices[0].delta.content
+                    collected_content += content_chunk
+                    if flight:
+                        flight.publish(content_chunk)
+                    if delivered_content is not None:
+                        continue
+                    if on_chunk:
+                        on_chunk(content_chunk)
+                    else:
+                        print(content_chunk, end="", flush=True)
+        except Exception:
+            # 从其他线程关闭流会使读取中断，这不是错误
+            if not self._cancel_event.is_set():
+                raise
+        finally:
+            with self._stream_lock:
+                self._active_stream = None
+            # 关闭底层HTTP响应，连接立即归还连接池
+            response_stream.close()
+
+        if not on_chunk:
+            print()  # 最后的换行
+
+        if self._cancel_event.is_set():
+            if delivered_content is None:
+                delivered_content = collected_content
+            if flight and (stopped_early or collected_content == delivered_content):
+                # 读取在上游结束前停止，订阅方得到的也是不完整的回复
+                flight.truncated = True
+            # 保留已收到的部分回复并标记为已中断
+            self.last_truncated = True
+            truncated = f"{delivered_content}\n{TRUNCATED_MARKER}" if delivered_content else TRUNCATED_MARKER
+            self.add_message("assistant", truncated)
+            return delivered_content
 
-        print()  # 最后的换行
         self.add_message("assistant", collected_content)
         return collected_content
 
+    def cancel(self):
+        """中断正在进行的请求，可从其他线程调用
+
+        如果其他对话正在订阅同一个请求，则不关闭连接，只停止向本对话输出。
+        """
+        self._cancel_event.set()
+        with self._stream_lock:
+            stream = self._active_stream
+            flight = self._active_flight
+        if stream is not None and not (flight and flight.followers):
+            stream.close()
+
     def clear_history(self):
-        """清除对话历史"""
-        self.conversation_history = []
+        """清除对话历史，开始新的对话"""
+        self.conversation_history.clear()
+        self.usage_history = []
+        if self.system_prompt:
+            self.add_message("system", self.system_prompt)
 
     def run_interactive(self):
         """运行交互式控制台会话"""
@@ -116,6 +543,11 @@ class DS_Bot:
             self.get_response(user_input, stream=True)
 
 
+def is_connection_error(error):
+    """错误是否由网络不可用引起（包括超时）"""
+    return isinstance(error, (APIConnectionError, OSError))
+
+
 # 使用示例
 if __name__ == "__main__":
     bot = DS_Bot()  # 在这里提供API密钥或设置环境变量
@@ -0,0 +1,110 @@
+"""Streaming export and import of saved conversations as JSONL
+
+Every line is one JSON object, a conversation is followed by its messages:
+
+    {"type": "conversation", "id": 1, "title": "对话 1", "created_at": "..."}
+    {"type": "message", "conversation_id": 1, "role": "user", "content": "...", "created_at": "..."}
+
+Files ending in .gz are gzip-compressed, files ending in .zst use zstd
+(requires the zstandard package). Both directions stream line by line, so
+memory use does not depend on the archive size.
+
+Command line usage:
+
+    python -m models.archive export conversations.jsonl.gz --user alice
+    python -m models.archive import conversations.jsonl.gz --user alice
+"""
+import argparse
+import gzip
+import io
+import json
+import time
+
+from models.conversation_store import ConversationStore
+
+
+def open_archive(path, mode):
+    """Open an archive for reading ("r") or writing ("w") as text"""
+    if path.endswith(".gz"):
+        # Level 6 is much faster than the default 9 for about the same size
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("读写 .zst 文件需要安装 zstandard 包")
+
+        if mode == "w":
+            stream = zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        return io.TextIOWrapper(stream, encoding="utf-8")
+
+    return open(path, mode, encoding="utf-8")
+
+
+def export_conversations(store, username, path):
+    """Write all conversations of a user to an archive"""
+    conversations = 0
+    messages = 0
+
+    with open_archive(path, "w") as archive:
+        for conversation in store.iter_conversations(username):
+            archive.write(json.dumps({"type": "conversation", **conversation}, ensure_ascii=False) + "\n")
+            conversations += 1
+
+            for message in store.iter_messages(conversation["id"]):
+                archive.write(json.dumps({
+                    "type": "message",
+                    "conversation_id": conversation["id"],
+                    "role": message["role"],
+                    "content": message["content"],
+                    "created_at": message["created_at"],
+                }, ensure_ascii=False) + "\n")
+                messages += 1
+
+    return {"conversations": conversations, "messages": messages}
+
+
+def read_archive(path):
+    """Yield (type, data) records from an archive"""
+    with open_archive(path, "r") as archive:
+        for line_number, line in enumerate(archive, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                raise ValueError(f"第 {line_number} 行不是有效的JSON")
+            yield record.pop("type"), record
+
+
+def import_conversations(store, username, path, batch_size=5000):
+    """Load an archive into the database as conversations of a user"""
+    return store.import_records(username, read_archive(path), batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出或导入对话记录（JSONL，可选 gzip/zstd 压缩）")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path", help="归档文件路径，.gz 或 .zst 结尾时自动压缩")
+    parser.add_argument("--user", required=True, help="用户名")
+    parser.add_argument("--db", default="chatbot.db", help="数据库文件")
+    parser.add_argument("--batch-size", type=int, default=5000, help="导入时每个事务的消息数")
+    args = parser.parse_args()
+
+    store = ConversationStore(args.db)
+    start = time.perf_counter()
+    if args.action == "export":
+        counts = export_conversations(store, args.user, args.path)
+    else:
+        counts = import_conversations(store, args.user, args.path, args.batch_size)
+    elapsed = time.perf_counter() - start
+
+    print(f"{counts['conversations']} 个对话，{counts['messages']} 条消息，用时 {elapsed:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Classify exported chat logs with SimpleBot's rules across all CPU cores
+
+The input is read as a stream and cut into chunks that a process pool
+classifies; every worker compiles the rules once. Each classified line
+becomes one JSON line in the output, in input order and written as soon
+as its chunk is done:
+
+    {"line": 12, "id": 345, "rule": "greeting"}
+
+Rule ids are those of SimpleBot.classify(), so the same input always
+gives the same output. JSONL input takes the text from --field (default
+"content", the field used by `python -m models.archive export`), CSV
+input from the column with that name. Lines without the field, or whose
+"role" differs from --role, are skipped.
+
+    python -m models.batch_classify conversations.jsonl --output rules.jsonl --role user
+    python -m models.batch_classify chats.csv --field message --workers 8
+"""
+import argparse
+import collections
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from models.archive import open_archive
+from models.simple_bot import SimpleBot
+
+# Set in each worker process by _init_worker
+_bot = None
+
+
+def _init_worker():
+    global _bot
+    _bot = SimpleBot()
+
+
+def classify_chunk(chunk, field="content", role=None):
+    """Classify (line number, JSON line or CSV row dict) pairs, returns output lines"""
+    bot = _bot or SimpleBot()
+    output = []
+    for line_number, raw in chunk:
+        if isinstance(raw, str):
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+        else:
+            record = raw
+
+        text = record.get(field)
+        if not isinstance(text, str) or (role and record.get("role") != role):
+            continue
+
+        result = {"line": line_number}
+        if "id" in record:
+            result["id"] = record["id"]
+        result["rule"] = bot.classify(text)
+        output.append(json.dumps(result, ensure_ascii=False) + "\n")
+    return output
+
+
+def read_chunks(path, chunk_size):
+    """Yield lists of (line number, raw line or CSV row), chunk_size at a time"""
+    with open_archive(path, "r") as source:
+        if re.sub(r"\.(gz|zst)$", "", path).endswith(".csv"):
+            reader = csv.DictReader(source)
+            rows = ((reader.line_num, row) for row in reader)
+        else:
+            rows = ((number, line) for number, line in enumerate(source, start=1) if line.strip())
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def classify_file(path, output, field="content", role=None, workers=None, chunk_size=2000):
+    """Classify a log file and write the results to the output stream
+
+    At most a few chunks per worker are in flight, so memory use does not
+    depend on the size of the log. Returns the number of classified lines.
+    """
+    workers = workers or os.cpu_count() or 1
+    classified = 0
+
+    if workers == 1:
+        # No pool, no pickling
+        _init_worker()
+        for chunk in read_chunks(path, chunk_size):
+            lines = classify_chunk(chunk, field, role)
+            output.writelines(lines)
+            classified += len(lines)
+        return classified
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = collections.deque()
+        for chunk in read_chunks(path, chunk_size):
+            pending.append(pool.submit(classify_chunk, chunk, field, role))
+            # Write finished chunks in input order and keep the queue short
+            while pending and (len(pending) >= workers * 4 or pending[0].done()):
+                lines = pending.popleft().result()
+                output.writelines(lines)
+                classified += len(lines)
+        while pending:
+            lines = pending.popleft().result()
+            output.writelines(lines)
+            classified += len(lines)
+
+    return classified
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用 SimpleBot 的规则批量分类聊天记录（JSONL 或 CSV）")
+    parser.add_argument("path", help="聊天记录文件，.csv 按 CSV 读取，其他按 JSONL 读取，可以是 .gz/.zst")
+    parser.add_argument("--output", default="-", help="结果文件（JSONL），默认输出到标准输出")
+    parser.add_argument("--field", default="content", help="消息文本所在的字段或列")
+    parser.add_argument("--role", help="只分类这个角色的消息，例如 user")
+    parser.add_argument("--workers", type=int, help="进程数，默认使用全部CPU核心")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="每个任务的行数")
+    args = parser.parse_args()
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        classified = classify_file(args.path, output, args.field, args.role, args.workers, args.chunk_size)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"已分类 {classified} 条消息，用时 {elapsed:.1f} 秒（{classified / max(elapsed, 1e-9):.0f} 条/秒）",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
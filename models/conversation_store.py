@@ -0,0 +1,567 @@
+import argparse
+import datetime
+import math
+import operator
+import os
+import random
+import re
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from models.message_codec import MessageCodec, build_dictionary
+
+# Runs of Latin letters and digits, and runs of other letters (Chinese)
+_SEGMENT = re.compile(r"[a-z0-9]+|[^\W_a-z0-9]+")
+
+
+def index_tokens(text):
+    """Text as written to the full-text index
+
+    Latin words and numbers are kept whole. Chinese has no spaces between
+    words, so every run of it becomes its overlapping character pairs plus
+    its last character: a Chinese term is then either a single character,
+    found as the prefix of a token, or a phrase of consecutive pairs.
+    """
+    tokens = []
+    for segment in _SEGMENT.findall(text.lower()):
+        if len(segment) == 1 or segment.isascii():
+            tokens.append(segment)
+        else:
+            tokens.extend(map(operator.add, segment, segment[1:]))
+            tokens.append(segment[-1])
+    return " ".join(tokens)
+
+
+def query_segments(query):
+    """The Latin words, numbers and Chinese runs of a search query"""
+    return _SEGMENT.findall(query.lower())
+
+
+def match_expression(segments):
+    """FTS5 query matching the messages that contain every segment
+
+    A Latin word matches any word starting with it, so "pass" finds
+    "password" while it is being typed; numbers match whole. Chinese
+    matches anywhere. Punctuation is never part of a segment, so user
+    input is never FTS5 syntax.
+    """
+    parts = []
+    for segment in segments:
+        if segment.isascii():
+            parts.append(f'"{segment}"' if segment.isdigit() else f'"{segment}"*')
+        elif len(segment) == 1:
+            # The first character of a pair, or the last one of a run
+            parts.append(f'"{segment}"*')
+        else:
+            parts.append('"' + " ".join(map(operator.add, segment, segment[1:])) + '"')
+    return " ".join(parts)
+
+
+def segment_pattern(segment):
+    """Regex finding a segment in message text the same way the index matches it"""
+    if not segment.isascii():
+        return re.escape(segment)
+    # Latin words at the start of a word, numbers only whole
+    return r"(?<![a-z0-9])" + re.escape(segment) + (r"(?![a-z0-9])" if segment.isdigit() else "")
+
+
+def make_snippet(text, segments, width=64):
+    """A piece of text around the first match, with the matches marked"""
+    pattern = re.compile("|".join(segment_pattern(segment)
+                                  for segment in sorted(segments, key=len, reverse=True)),
+                         re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, first.start() - width // 4) if first else 0
+    end = min(len(text), start + width)
+
+    snippet = pattern.sub(lambda match: f"【{match.group(0)}】", text[start:end])
+    return ("…" if start else "") + snippet + ("…" if end < len(text) else "")
+
+
+def rank_texts(texts, segments, k1=1.2, b=0.75):
+    """BM25 score of each text for the query segments, higher is better
+
+    Matches are counted the way the index matches them (segment_pattern).
+    Segment weights come from the texts themselves: SQLite's bm25() counts
+    every message matching a segment to weigh it, which took up to 2 s
+    per search with a million messages.
+    """
+    average_length = sum(map(len, texts)) / len(texts) or 1
+    scores = [0.0] * len(texts)
+    for segment in segments:
+        pattern = re.compile(segment_pattern(segment), re.IGNORECASE)
+        counts = [len(pattern.findall(text)) for text in texts]
+        matching = sum(1 for count in counts if count)
+        weight = math.log(1 + (len(texts) - matching + 0.5) / (matching + 0.5))
+        for i, count in enumerate(counts):
+            if count:
+                length_norm = 1 - b + b * len(texts[i]) / average_length
+                scores[i] += weight * count * (k1 + 1) / (count + k1 * length_norm)
+    return scores
+
+
+class ConversationStore:
+    """Saved conversations and their messages, with a full-text index
+
+    Message bodies are stored zlib-compressed (see MessageCodec) unless
+    compress is False. Only the full-text index holds the text uncompressed,
+    so a body is decompressed only when a conversation is loaded or
+    exported, and for the newest matches a search ranks. The index is
+    written in the same transaction as the message, from the plain text at
+    hand, so any SQLite client can still insert into messages; rows it adds
+    are not searchable until the index is rebuilt.
+    """
+
+    def __init__(self, db_path="chatbot.db", compress=True):
+        self.db_path = db_path
+        self.compress = compress
+        self.codec = MessageCodec()
+        self.create_tables()
+        self.load_dictionaries()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def encode(self, content):
+        return self.codec.encode(content) if self.compress else content
+
+    def message_text(self, content):
+        try:
+            return self.codec.decode(content)
+        except KeyError:
+            # Dictionary trained by another process after this one started
+            self.load_dictionaries()
+            return self.codec.decode(content)
+
+    def create_tables(self):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        # WAL lets searches run while messages are being saved
+        cursor.execute("PRAGMA journal_mode=WAL")
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            title TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id INTEGER NOT NULL REFERENCES conversations(id),
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        ''')
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, id)"
+        )
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS compression_dictionaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data BLOB NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        ''')
+
+        # Earlier databases index the messages table itself or use the trigram
+        # tokenizer, which cannot match terms shorter than three characters
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'messages_fts'")
+        row = cursor.fetchone()
+        rebuild_index = row is None or "prefix" not in row[0]
+        if rebuild_index:
+            cursor.execute("DROP TABLE IF EXISTS messages_fts")
+        # Earlier versions kept the index up to date with triggers that called
+        # a Python function, so other SQLite clients could not insert messages
+        cursor.execute("DROP TRIGGER IF EXISTS messages_fts_insert")
+        cursor.execute("DROP TRIGGER IF EXISTS messages_fts_delete")
+
+        # Full-text index over index_tokens() of the message content. It is
+        # contentless: the text lives compressed in messages. The prefix index
+        # answers single character searches without scanning every token.
+        cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            content, content='', tokenize='unicode61', prefix='1'
+        )
+        ''')
+
+        if rebuild_index:
+            rows = conn.execute("SELECT id, content FROM messages")
+            cursor.executemany(
+                "INSERT INTO messages_fts (rowid, content) VALUES (?, ?)",
+                ((message_id, index_tokens(self.message_text(content))) for message_id, content in rows)
+            )
+
+        conn.commit()
+        conn.close()
+
+    def load_dictionaries(self):
+        """Load the shared compression dictionaries, the newest one compresses new messages"""
+        conn = self.connect()
+        rows = conn.execute("SELECT id, data FROM compression_dictionaries ORDER BY id").fetchall()
+        conn.close()
+
+        for dictionary_id, data in rows:
+            self.codec.add_dictionary(dictionary_id, data)
+
+    def train_dictionary(self, sample_size=5000, size=32 * 1024):
+        """Build a dictionary from recent messages and use it for new ones
+
+        Older messages keep the dictionary they were compressed with, so
+        dictionaries are never deleted.
+        """
+        conn = self.connect()
+        rows = conn.execute(
+            "SELECT content FROM messages ORDER BY id DESC LIMIT ?", (sample_size,)
+        ).fetchall()
+        dictionary = build_dictionary([self.message_text(row[0]) for row in rows], size)
+        if not dictionary:
+            conn.close()
+            return None
+
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO compression_dictionaries (data, created_at) VALUES (?, ?)",
+            (dictionary, datetime.datetime.now().isoformat())
+        )
+        dictionary_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+
+        self.codec.add_dictionary(dictionary_id, dictionary)
+        return dictionary_id
+
+    def create_conversation(self, username, title):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "INSERT INTO conversations (username, title, created_at) VALUES (?, ?, ?)",
+            (username, title, datetime.datetime.now().isoformat())
+        )
+        conversation_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+
+        return conversation_id
+
+    def get_conversation(self, conversation_id):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT id, username, title, created_at FROM conversations WHERE id = ?",
+            (conversation_id,)
+        )
+        row = cursor.fetchone()
+        conn.close()
+
+        if row:
+            return {"id": row[0], "username": row[1], "title": row[2], "created_at": row[3]}
+        return None
+
+    def add_message(self, conversation_id, role, content):
+        return self.add_messages(conversation_id, [(role, content)])
+
+    def add_messages(self, conversation_id, messages):
+        """Save (role, content) pairs in one transaction, returns the id of the first"""
+        created_at = datetime.datetime.now().isoformat()
+        rows = [(conversation_id,) + self.prepare_message(role, content, created_at)
+                for role, content in messages]
+
+        conn = self.connect()
+        cursor = conn.cursor()
+        message_id = self._insert_messages(cursor, rows)
+        conn.commit()
+        conn.close()
+
+        return message_id
+
+    def prepare_message(self, role, content, created_at):
+        """(role, stored content, index tokens, created_at) of a message
+
+        Done before the transaction starts, so the write lock is not held
+        while the text is compressed and tokenized.
+        """
+        return role, self.encode(content), index_tokens(content), created_at
+
+    def _insert_messages(self, cursor, rows):
+        """Insert prepared (conversation id, role, content, tokens, created_at) rows
+
+        Returns the id of the first row, the others follow it. The first
+        insert takes the write lock for the rest of the transaction, so no
+        other connection can take the ids that come after it.
+        """
+        conversation_id, role, content, _, created_at = rows[0]
+        cursor.execute(
+            "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+            (conversation_id, role, content, created_at)
+        )
+        first_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO messages (id, conversation_id, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(first_id + offset, conversation_id, role, content, created_at)
+             for offset, (conversation_id, role, content, _, created_at) in enumerate(rows[1:], start=1)]
+        )
+        cursor.executemany(
+            "INSERT INTO messages_fts (rowid, content) VALUES (?, ?)",
+            [(first_id + offset, row[3]) for offset, row in enumerate(rows)]
+        )
+        return first_id
+
+    def get_messages(self, conversation_id):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT id, role, content FROM messages WHERE conversation_id = ? ORDER BY id",
+            (conversation_id,)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [{"id": row[0], "role": row[1], "content": self.message_text(row[2])} for row in rows]
+
+    def search(self, username, query, limit=50, candidates=200):
+        """Search the messages of a user, returns (results, complete)
+
+        Results are the best `limit` matches with highlighted snippets. Only
+        the newest `candidates` matches are read from the index, and only
+        those are decompressed and ranked (rank_texts): an older message is
+        not returned when there are more matches than that, however well it
+        matches. complete is False in that case. Ranking every match in
+        SQLite instead took up to 2 s with a million messages.
+        """
+        segments = query_segments(query)
+        match = match_expression(segments)
+        if not match:
+            return [], True
+
+        conn = self.connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT m.id, m.conversation_id, c.title, m.role, m.content
+        FROM messages_fts
+        JOIN messages m ON m.id = messages_fts.rowid
+        JOIN conversations c ON c.id = m.conversation_id
+        WHERE messages_fts MATCH ? AND c.username = ?
+        ORDER BY messages_fts.rowid DESC
+        LIMIT ?
+        ''', (match, username, candidates + 1))
+        rows = cursor.fetchall()
+        conn.close()
+
+        complete = len(rows) <= candidates
+        rows = rows[:candidates]
+        if not rows:
+            return [], complete
+
+        texts = [self.message_text(row[4]) for row in rows]
+        scores = rank_texts(texts, segments)
+        # Newest first among equal scores
+        best = sorted(range(len(rows)), key=lambda i: -scores[i])[:limit]
+        results = [{"message_id": rows[i][0], "conversation_id": rows[i][1], "title": rows[i][2],
+                    "role": rows[i][3], "snippet": make_snippet(texts[i], segments)} for i in best]
+        return results, complete
+
+    def iter_conversations(self, username):
+        """Yield the conversations of a user one at a time"""
+        conn = self.connect()
+        try:
+            cursor = conn.execute(
+                "SELECT id, title, created_at FROM conversations WHERE username = ? ORDER BY id",
+                (username,)
+            )
+            for row in cursor:
+                yield {"id": row[0], "title": row[1], "created_at": row[2]}
+        finally:
+            conn.close()
+
+    def iter_messages(self, conversation_id):
+        """Yield the messages of a conversation one at a time"""
+        conn = self.connect()
+        try:
+            cursor = conn.execute(
+                "SELECT id, role, content, created_at FROM messages WHERE conversation_id = ? ORDER BY id",
+                (conversation_id,)
+            )
+            for row in cursor:
+                yield {"id": row[0], "role": row[1], "content": self.message_text(row[2]),
+                       "created_at": row[3]}
+        finally:
+            conn.close()
+
+    def import_records(self, username, records, batch_size=5000):
+        """Insert archived conversations in batched transactions
+
+        records yields ("conversation", data) and ("message", data) pairs,
+        every conversation directly followed by its messages, so only the
+        conversation being imported has to be remembered.
+
+        A batch is parsed and encoded before its transaction starts, so the
+        write lock is only held while its rows are inserted and the app can
+        keep saving messages during a long import.
+        """
+        conn = self.connect()
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        conversations = 0
+        messages = 0
+        current_source_id = None
+        current = None
+        # Conversations not written yet, and (conversation, prepared message) pairs
+        new_conversations = []
+        batch = []
+
+        try:
+            for kind, data in records:
+                if kind == "conversation":
+                    current_source_id = data["id"]
+                    current = {"id": None, "title": data["title"], "created_at": data["created_at"]}
+                    new_conversations.append(current)
+                    conversations += 1
+                elif kind == "message":
+                    if data["conversation_id"] != current_source_id:
+                        raise ValueError(f"消息所属的对话 {data['conversation_id']} 不在它之前")
+                    batch.append((current, self.prepare_message(data["role"], data["content"],
+                                                                data["created_at"])))
+                    messages += 1
+
+                if len(batch) + len(new_conversations) >= batch_size:
+                    self._write_import_batch(conn, username, new_conversations, batch)
+                    new_conversations = []
+                    batch = []
+
+            self._write_import_batch(conn, username, new_conversations, batch)
+        finally:
+            conn.close()
+
+        return {"conversations": conversations, "messages": messages}
+
+    def _write_import_batch(self, conn, username, conversations, batch):
+        """Insert a parsed batch in one transaction"""
+        if not conversations and not batch:
+            return
+
+        cursor = conn.cursor()
+        for conversation in conversations:
+            cursor.execute(
+                "INSERT INTO conversations (username, title, created_at) VALUES (?, ?, ?)",
+                (username, conversation["title"], conversation["created_at"])
+            )
+            conversation["id"] = cursor.lastrowid
+        if batch:
+            self._insert_messages(cursor, [(conversation["id"],) + message for conversation, message in batch])
+        conn.commit()
+
+
+def _benchmark_records(conversations, rng):
+    """Synthetic conversations: short questions and long markdown-style replies"""
+    topics = ["Python", "SQLite", "PyQt5", "上下文缓存", "数据库索引", "流式响应", "多线程", "网络请求"]
+    sentences = [
+        "这是一个很常见的问题，下面分几个步骤来说明。",
+        "首先需要确认{topic}的版本是否满足要求。",
+        "如果仍然有问题，可以检查日志中的错误信息。",
+        "在大多数情况下，{topic}的默认配置已经足够使用。",
+        "需要注意的是，修改配置之后要重新启动程序才能生效。",
+        "下面是一个简单的示例代码：",
+        "总结一下，关键在于理解{topic}的工作原理。",
+        "性能方面，{topic}通常不是瓶颈，可以先用分析工具确认。",
+        "希望这些信息对您有帮助，如有其他问题请继续提问。",
+    ]
+    code = "```python\nimport sqlite3\n\nconn = sqlite3.connect(\"chatbot.db\")\n" \
+           "cursor = conn.execute(\"SELECT id, content FROM messages WHERE id = ?\", ({n},))\n" \
+           "print(cursor.fetchone())\n```\n"
+
+    for conversation_id in range(1, conversations + 1):
+        yield "conversation", {"id": conversation_id, "title": f"对话 {conversation_id}",
+                               "created_at": "2024-01-01T00:00:00"}
+        for _ in range(10):
+            topic = rng.choice(topics)
+            question = f"请问{topic}出现第{rng.randint(1, 999)}号错误应该怎么办？"
+            parts = []
+            for _ in range(rng.randint(4, 16)):
+                if rng.random() < 0.1:
+                    parts.append(code.format(n=rng.randint(1, 10 ** 6)))
+                else:
+                    parts.append(rng.choice(sentences).format(topic=rng.choice(topics)))
+            reply = "\n".join(f"{i + 1}. {part}" for i, part in enumerate(parts))
+            for role, content in (("user", question), ("assistant", reply)):
+                yield "message", {"conversation_id": conversation_id, "role": role,
+                                  "content": content, "created_at": "2024-01-01T00:00:00"}
+
+
+def _table_sizes(db_path):
+    """Bytes used by the message bodies and by the full-text index"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    try:
+        sizes = dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+    except sqlite3.OperationalError:
+        # SQLite built without the dbstat table
+        sizes = {}
+    conn.close()
+    index = sum(size for name, size in sizes.items() if name.startswith("messages_fts"))
+    return sizes.get("messages", 0), index, os.path.getsize(db_path)
+
+
+def _benchmark(conversations=2000):
+    """Size and read latency of plain, zlib and zlib+dictionary storage"""
+    print(f"{'存储方式':<14}{'消息表':>10}{'索引':>10}{'文件':>10}{'读取对话':>12}{'搜索':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, compress, dictionary in (("纯文本", False, False), ("zlib", True, False),
+                                           ("zlib+字典", True, True)):
+            store = ConversationStore(os.path.join(workdir, name + ".db"), compress=compress)
+            records = _benchmark_records(conversations, random.Random(0))
+            if dictionary:
+                # Train on the first conversations, as the app would on real traffic
+                first = [next(records) for _ in range(21 * 100)]
+                store.import_records("bench", iter(first))
+                store.train_dictionary()
+            store.import_records("bench", records)
+
+            ids = random.Random(1).sample(range(1, conversations + 1), 200)
+            read_times = []
+            for conversation_id in ids:
+                start = time.perf_counter()
+                store.get_messages(conversation_id)
+                read_times.append(time.perf_counter() - start)
+
+            search_times = []
+            for query in ("上下文缓存", "数据库索引 错误", "fetchone", "多线程 版本", "错误", "错", "sq"):
+                start = time.perf_counter()
+                store.search("bench", query)
+                search_times.append(time.perf_counter() - start)
+
+            messages_size, index_size, file_size = _table_sizes(store.db_path)
+            print(f"{name:<14}{messages_size / 2 ** 20:>8.1f}MB{index_size / 2 ** 20:>8.1f}MB"
+                  f"{file_size / 2 ** 20:>8.1f}MB{statistics.mean(read_times) * 1000:>10.2f}ms"
+                  f"{statistics.mean(search_times) * 1000:>8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对话数据库的压缩维护与基准测试")
+    parser.add_argument("action", choices=["train-dictionary", "benchmark"])
+    parser.add_argument("--db", default="chatbot.db", help="数据库文件")
+    parser.add_argument("--conversations", type=int, default=2000, help="基准测试的对话数（每个10轮）")
+    args = parser.parse_args()
+
+    if args.action == "benchmark":
+        _benchmark(args.conversations)
+        return
+
+    dictionary_id = ConversationStore(args.db).train_dictionary()
+    if dictionary_id is None:
+        print("数据库中没有消息，无法生成字典")
+    else:
+        print(f"已生成压缩字典 {dictionary_id}，之后保存的消息将使用它压缩")
+
+
+if __name__ == "__main__":
+    main()
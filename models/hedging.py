@@ -0,0 +1,181 @@
+import queue
+import threading
+import time
+
+
+class HedgeBudget:
+    """限制对冲请求的数量，并统计对冲效果
+
+    令牌桶：开始时有 burst 次对冲额度，每个请求增加 max_ratio 次，最多
+    积累 burst 次（至少1次）。长期来看对冲请求不超过全部请求的 max_ratio，
+    刚启动时或很久没有对冲之后也能立即对冲慢请求。
+    """
+
+    def __init__(self, max_ratio=0.05, burst=3):
+        self.max_ratio = max_ratio
+        self.capacity = max(burst, 1)
+        self._lock = threading.Lock()
+        self.tokens = float(burst)
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.denied = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+            self.tokens = min(self.capacity, self.tokens + self.max_ratio)
+
+    def try_acquire(self):
+        """预算允许时占用一次对冲"""
+        with self._lock:
+            # 允许浮点累加的误差，20次 0.05 要凑满1次
+            if self.tokens >= 1 - 1e-9:
+                self.tokens = max(0.0, self.tokens - 1)
+                self.hedges_sent += 1
+                return True
+            self.denied += 1
+            return False
+
+    def record_winner(self, is_hedge):
+        with self._lock:
+            if is_hedge:
+                self.hedge_wins += 1
+            else:
+                self.primary_wins += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges_sent": self.hedges_sent,
+                "hedge_ratio": self.hedges_sent / self.requests if self.requests else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "primary_wins": self.primary_wins,
+                "denied": self.denied,
+            }
+
+
+class _Attempt(threading.Thread):
+    """在后台打开一个流式请求并读到第一个有内容的片段"""
+
+    def __init__(self, is_hedge, open_stream, results):
+        super().__init__(daemon=True)
+        self.is_hedge = is_hedge
+        self.open_stream = open_stream
+        self.results = results
+        self.stream = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def run(self):
+        try:
+            stream = self.open_stream()
+            with self._lock:
+                self.stream = stream
+                if self.cancelled:
+                    stream.close()
+                    return
+
+            iterator = iter(stream)
+            buffered = []
+            for chunk in iterator:
+                buffered.append(chunk)
+                if getattr(chunk, "usage", None) or (chunk.choices and chunk.choices[0].delta.content):
+                    break
+            self.results.put((self, buffered, iterator, None))
+        except Exception as e:
+            self.results.put((self, None, None, e))
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            stream = self.stream
+        if stream is not None:
+            stream.close()
+
+
+class HedgedStream:
+    """获胜请求的流，先产出已缓冲的片段，接口与原始流相同"""
+
+    def __init__(self, attempt, buffered, iterator):
+        self.attempt = attempt
+        self.buffered = buffered
+        self.iterator = iterator
+
+    def __iter__(self):
+        yield from self.buffered
+        yield from self.iterator
+
+    def close(self):
+        self.attempt.cancel()
+
+
+def open_hedged(open_primary, open_backup, delay, budget, cancel_event):
+    """打开流式请求，首个令牌超过 delay 秒未到达时向备用模型/端点发出对冲请求
+
+    返回先产出内容的一方的流，另一方立即关闭。两方都失败时抛出主请求的错误。
+    """
+    budget.record_request()
+    results = queue.Queue()
+    primary = _Attempt(False, open_primary, results)
+    primary.start()
+    attempts = [primary]
+    errors = {}
+
+    started = time.monotonic()
+    deadline_passed = False
+    while True:
+        if cancel_event.is_set():
+            # 返回一个空流，由调用方按已中断处理
+            for attempt in attempts:
+                attempt.cancel()
+            return HedgedStream(primary, [], iter(()))
+
+        try:
+            attempt, buffered, iterator, error = results.get(timeout=0.05)
+        except queue.Empty:
+            if not deadline_passed and time.monotonic() - started >= delay:
+                deadline_passed = True
+                if budget.try_acquire():
+                    backup = _Attempt(True, open_backup, results)
+                    backup.start()
+                    attempts.append(backup)
+            continue
+
+        if error is not None:
+            # 还有请求在进行时继续等待，全部失败才报告主请求的错误
+            errors[attempt.is_hedge] = error
+            if len(errors) == len(attempts):
+                raise errors.get(False, error)
+            continue
+
+        # 第一个收到内容的请求获胜，关闭另一个
+        for other in attempts:
+            if other is not attempt:
+                other.cancel()
+        budget.record_winner(attempt.is_hedge)
+        return HedgedStream(attempt, buffered, iterator)
+
+
+def open_cancellable(open_stream, cancelled):
+    """在后台打开流式请求，等待响应头和首个令牌期间 cancelled() 为真时立即返回
+
+    被取消时返回一个空流，由调用方按已中断处理；后台的请求在响应到达时立即关闭，
+    不会再占用本线程。
+    """
+    results = queue.Queue()
+    attempt = _Attempt(False, open_stream, results)
+    attempt.start()
+    while True:
+        if cancelled():
+            attempt.cancel()
+            return HedgedStream(attempt, [], iter(()))
+        try:
+            attempt, buffered, iterator, error = results.get(timeout=0.05)
+        except queue.Empty:
+            continue
+        if error is not None:
+            raise error
+        return HedgedStream(attempt, buffered, iterator)
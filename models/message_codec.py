@@ -0,0 +1,101 @@
+import collections
+import re
+import zlib
+
+# First byte of a compressed body. Bodies stored as TEXT are uncompressed,
+# so rows written before compression existed stay readable.
+ZLIB = 1
+ZLIB_DICTIONARY = 2  # followed by the dictionary id as 2 bytes
+
+# zlib only looks back 32 KiB, a larger preset dictionary is never used
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+_SEGMENT = re.compile(r"[^\n。！？.!?]+[\n。！？.!?]*")
+
+
+class MessageCodec:
+    """Compresses message bodies with zlib, optionally with a shared dictionary
+
+    encode() returns bytes for a compressed body, or the text itself when it
+    is too short to be worth compressing. decode() accepts either.
+    """
+
+    def __init__(self, level=6, min_size=64):
+        self.level = level
+        self.min_size = min_size
+        self.dictionaries = {}
+        self.dictionary_id = None
+
+    def add_dictionary(self, dictionary_id, data, current=True):
+        self.dictionaries[dictionary_id] = data
+        if current:
+            self.dictionary_id = dictionary_id
+
+    def encode(self, text):
+        raw = text.encode("utf-8")
+        if len(raw) < self.min_size:
+            return text
+
+        if self.dictionary_id is None:
+            compressor = zlib.compressobj(self.level)
+            header = bytes([ZLIB])
+        else:
+            compressor = zlib.compressobj(self.level, zdict=self.dictionaries[self.dictionary_id])
+            header = bytes([ZLIB_DICTIONARY]) + self.dictionary_id.to_bytes(2, "big")
+        body = header + compressor.compress(raw) + compressor.flush()
+
+        # Random-looking text can grow, keep it as it is
+        if len(body) >= len(raw):
+            return text
+        return body
+
+    def decode(self, value):
+        if value is None or isinstance(value, str):
+            return value
+
+        value = bytes(value)
+        if value[0] == ZLIB:
+            return zlib.decompress(value[1:]).decode("utf-8")
+        if value[0] == ZLIB_DICTIONARY:
+            dictionary_id = int.from_bytes(value[1:3], "big")
+            if dictionary_id not in self.dictionaries:
+                raise KeyError(f"压缩字典 {dictionary_id} 不存在")
+            decompressor = zlib.decompressobj(zdict=self.dictionaries[dictionary_id])
+            return (decompressor.decompress(value[3:]) + decompressor.flush()).decode("utf-8")
+        raise ValueError(f"未知的消息压缩格式 {value[0]}")
+
+
+def build_dictionary(samples, size=MAX_DICTIONARY_SIZE):
+    """Build a zlib preset dictionary from sample messages
+
+    Sentences and lines that recur across samples are packed with the most
+    frequent ones last, where zlib finds them at the shortest distance.
+    Remaining space is filled with the start of the samples.
+    """
+    size = min(size, MAX_DICTIONARY_SIZE)
+    counts = collections.Counter()
+    for sample in samples:
+        counts.update(set(segment.strip() for segment in _SEGMENT.findall(sample)))
+
+    recurring = [segment.encode("utf-8") for segment, count in counts.items()
+                 if count > 1 and len(segment) > 3]
+    recurring.sort(key=lambda segment: counts[segment.decode("utf-8")] * len(segment))
+
+    picked = []
+    used = 0
+    for segment in reversed(recurring):
+        if used + len(segment) > size:
+            break
+        picked.append(segment)
+        used += len(segment)
+    picked.reverse()
+
+    filler = []
+    for sample in samples:
+        if used >= size:
+            break
+        data = sample.encode("utf-8")[:size - used]
+        filler.append(data)
+        used += len(data)
+
+    return b"".join(filler + picked)
@@ -0,0 +1,144 @@
+import json
+import sys
+from json.encoder import encode_basestring
+
+
+# 每种角色的消息JSON开头，所有消息共用
+_PREFIXES = {}
+
+
+class Message:
+    """对话中的一条消息
+
+    使用 __slots__ 避免每条消息一个字典的开销，角色字符串经过驻留，
+    所有消息共享同一个对象。内容只以JSON编码的形式保存一份，加入时
+    编码一次，之后构造请求内容不必重新编码，读取 content 时才解码。
+    消息外层的 {"role":...,"content": 按角色共用，不在每条消息中重复保存。
+
+    编码直接调用 json 的C实现转义字符串，省去每条消息构造字典和
+    编码器的开销，结果与 json.dumps(ensure_ascii=False) 等价。
+    """
+
+    __slots__ = ("role", "_content_json")
+
+    def __init__(self, role, content):
+        self.role = sys.intern(role)
+        if self.role not in _PREFIXES:
+            _PREFIXES[self.role] = '{"role":' + encode_basestring(self.role) + ',"content":'
+        self._content_json = encode_basestring(content) if isinstance(content, str) else json.dumps(content)
+
+    @property
+    def content(self):
+        return json.loads(self._content_json)
+
+    def encoded(self):
+        """该消息的JSON编码"""
+        return _PREFIXES[self.role] + self._content_json + "}"
+
+    def __repr__(self):
+        return f"Message({self.role!r}, {self.content!r})"
+
+
+class MessageHistory:
+    """只追加的紧凑对话历史
+
+    消息一旦加入就不再修改，每条消息只保存自己的JSON编码，
+    构造请求内容只需把已编码的片段拼接起来。
+    """
+
+    def __init__(self):
+        self._messages = []
+
+    def append(self, role, content):
+        message = Message(role, content)
+        self._messages.append(message)
+        return message
+
+    def pop(self):
+        """移除最后一条消息（用于撤销未发送成功的消息）"""
+        return self._messages.pop()
+
+    def clear(self):
+        self._messages = []
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __iter__(self):
+        return iter(self._messages)
+
+    def __getitem__(self, index):
+        return self._messages[index]
+
+    def payload_json(self):
+        """整个消息列表的JSON编码，只拼接已编码的片段"""
+        if not self._messages:
+            return "[]"
+        parts = ["["]
+        for message in self._messages:
+            parts += (_PREFIXES[message.role], message._content_json, "},")
+        parts[-1] = "}]"
+        return "".join(parts)
+
+
+def _benchmark(count=50000):
+    """对比字典列表与 MessageHistory 的内存占用和序列化耗时"""
+    import time
+    import tracemalloc
+
+    roles = ["user", "assistant"]
+
+    def contents():
+        # 每种结构都有自己的一份内容字符串，内存包括内容本身
+        return (f"第{i}条消息，" + "内容" * (i % 50) for i in range(count))
+
+    def build_dicts():
+        return [{"role": roles[i % 2], "content": content} for i, content in enumerate(contents())]
+
+    def build_history():
+        history = MessageHistory()
+        for i, content in enumerate(contents()):
+            history.append(roles[i % 2], content)
+        return history
+
+    def traced(function):
+        """运行 function，返回结果和它仍然占用的内存"""
+        tracemalloc.start()
+        try:
+            result = function()
+            return result, tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+    dict_history, dict_memory = traced(build_dicts)
+    history, history_memory = traced(build_history)
+
+    start = time.perf_counter()
+    build_dicts()
+    dict_build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    build_history()
+    history_build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    json.dumps(dict_history, ensure_ascii=False)
+    dict_time = time.perf_counter() - start
+
+    # 模拟下一轮请求：追加一条消息后重新构造请求内容
+    history.append("user", "下一个问题")
+    start = time.perf_counter()
+    history.payload_json()
+    join_time = time.perf_counter() - start
+
+    print(f"消息数量: {count}")
+    print(f"字典列表内存（含内容）: {dict_memory / 1024:.0f} KiB")
+    print(f"MessageHistory内存（含编码后的内容）: {history_memory / 1024:.0f} KiB")
+    print(f"构建字典列表: {dict_build_time * 1000:.1f} ms")
+    print(f"构建 MessageHistory（含编码）: {history_build_time * 1000:.1f} ms")
+    print(f"每次请求 json.dumps(字典列表): {dict_time * 1000:.1f} ms")
+    print(f"每次请求 payload_json() 拼接: {join_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,188 @@
+import sqlite3
+import datetime
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Outbox:
+    """Messages waiting to be sent while the API is unreachable"""
+
+    def __init__(self, db_path="chatbot.db"):
+        self.db_path = db_path
+        self.create_tables()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def create_tables(self):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            content TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL
+        )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def enqueue(self, conversation_id, username, content):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "INSERT INTO outbox (conversation_id, username, content, created_at) VALUES (?, ?, ?, ?)",
+            (conversation_id, username, content, datetime.datetime.now().isoformat())
+        )
+        entry_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+
+        return entry_id
+
+    def pending(self, username=None):
+        """Pending entries in the order they were queued"""
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        if username is None:
+            cursor.execute(
+                "SELECT id, conversation_id, username, content, attempts FROM outbox "
+                "WHERE status = 'pending' ORDER BY id"
+            )
+        else:
+            cursor.execute(
+                "SELECT id, conversation_id, username, content, attempts FROM outbox "
+                "WHERE status = 'pending' AND username = ? ORDER BY id",
+                (username,)
+            )
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [{"id": row[0], "conversation_id": row[1], "username": row[2],
+                 "content": row[3], "attempts": row[4]} for row in rows]
+
+    def pending_count(self, conversation_id):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT COUNT(*) FROM outbox WHERE status = 'pending' AND conversation_id = ?",
+            (conversation_id,)
+        )
+        count = cursor.fetchone()[0]
+        conn.close()
+
+        return count
+
+    def mark_sent(self, entry_id):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+        conn.commit()
+        conn.close()
+
+    def mark_failed(self, entry_id, give_up=False):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "UPDATE outbox SET attempts = attempts + 1, status = ? WHERE id = ?",
+            ("failed" if give_up else "pending", entry_id)
+        )
+        conn.commit()
+        conn.close()
+
+
+def is_reachable(host, port=443, timeout=3):
+    """Check whether a TCP connection to the endpoint can be opened"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+class OutboxDrainer(threading.Thread):
+    """Replays queued messages once the endpoint is reachable again
+
+    Only the entries of username are replayed (all users when None).
+    Conversations are drained concurrently, up to max_workers at a time,
+    while the messages of one conversation are always sent in order.
+    send(entry) returns the reply or raises; connection errors leave the
+    entry queued, any other error gives up on it after max_attempts.
+    on_reply(entry, reply, error) is called from a worker thread.
+    """
+
+    def __init__(self, outbox, send, on_reply, host, port=443, username=None,
+                 is_connection_error=None, max_workers=4, poll_interval=10, max_attempts=3):
+        super().__init__(daemon=True)
+        self.outbox = outbox
+        self.username = username
+        self.send = send
+        self.on_reply = on_reply
+        self.host = host
+        self.port = port
+        self.is_connection_error = is_connection_error or (lambda e: isinstance(e, OSError))
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def wake(self):
+        """Check the outbox now instead of waiting for the next poll"""
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not self._stop_event.is_set():
+                entries = self.outbox.pending(self.username)
+                if entries and is_reachable(self.host, self.port):
+                    by_conversation = {}
+                    for entry in entries:
+                        by_conversation.setdefault(entry["conversation_id"], []).append(entry)
+
+                    # Wait for this round before looking at the outbox again
+                    list(executor.map(self.drain_conversation, by_conversation.values()))
+
+                    # Drain again right away if the round made progress
+                    if len(self.outbox.pending(self.username)) < len(entries):
+                        continue
+
+                self._wake_event.wait(self.poll_interval)
+                self._wake_event.clear()
+
+    def drain_conversation(self, entries):
+        """Send the queued messages of one conversation in order"""
+        for entry in entries:
+            if self._stop_event.is_set():
+                return
+            try:
+                reply = self.send(entry)
+            except Exception as e:
+                if self.is_connection_error(e):
+                    # Still unreachable, keep this and the later messages queued
+                    return
+                give_up = entry["attempts"] + 1 >= self.max_attempts
+                self.outbox.mark_failed(entry["id"], give_up)
+                if give_up:
+                    self.on_reply(entry, None, e)
+                    continue
+                return
+
+            self.outbox.mark_sent(entry["id"])
+            self.on_reply(entry, reply, None)
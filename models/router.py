@@ -0,0 +1,74 @@
+import random
+import time
+
+# SimpleBot rules that may be answered locally in advanced mode, with replies
+# that are true there. SimpleBot's own replies to help, API key or GPU
+# questions describe simple mode, so those always go to DS_Bot.
+LOCAL_REPLIES = {
+    "greeting": ["Hello!", "Hi there!", "Hey! How can I help you?"],
+    "how_are_you": ["I'm doing well, thanks! What can I do for you?"],
+    "goodbye": ["Goodbye!", "See you later!", "Have a great day!"],
+}
+
+
+class QueryRouter:
+    """Answers high-confidence small talk locally, the rest goes to DS_Bot
+
+    SimpleBot decides whether a message matches one of the LOCAL_REPLIES
+    rules. Local answers are also added to the DS_Bot history so the model
+    keeps the full context of the conversation.
+    """
+
+    def __init__(self, simple_bot, ds_bot, threshold=0.7):
+        self.simple_bot = simple_bot
+        self.ds_bot = ds_bot
+        self.threshold = threshold
+        self.stats = {
+            "local": {"count": 0, "total_time": 0.0},
+            "remote": {"count": 0, "total_time": 0.0},
+        }
+
+    def try_local(self, message):
+        """Return a local reply, or None when the message should go to DS_Bot"""
+        if message.strip().lower() == "/router":
+            return self.describe()
+        if message.startswith("/"):
+            return None
+
+        start = time.perf_counter()
+        pattern, confidence = self.simple_bot.match(message)
+        if pattern is None or confidence < self.threshold:
+            return None
+        replies = LOCAL_REPLIES.get(self.simple_bot.rule_ids[pattern])
+        if replies is None:
+            return None
+
+        reply = random.choice(replies)
+        self.ds_bot.add_message("user", message)
+        self.ds_bot.add_message("assistant", reply)
+        self.record("local", time.perf_counter() - start)
+        return reply
+
+    def record(self, route, seconds):
+        """Record the latency of a reply that took the given route"""
+        self.stats[route]["count"] += 1
+        self.stats[route]["total_time"] += seconds
+
+    def summary(self):
+        total = sum(route["count"] for route in self.stats.values())
+        return {
+            name: {
+                "count": route["count"],
+                "hit_ratio": route["count"] / total if total else 0.0,
+                "avg_ms": route["total_time"] / route["count"] * 1000 if route["count"] else 0.0,
+            }
+            for name, route in self.stats.items()
+        }
+
+    def describe(self):
+        summary = self.summary()
+        return (f"本地回答: {summary['local']['count']} 次 ({summary['local']['hit_ratio']:.0%})，"
+                f"平均 {summary['local']['avg_ms']:.2f} ms\n"
+                f"Deepseek回答: {summary['remote']['count']} 次 ({summary['remote']['hit_ratio']:.0%})，"
+                f"平均 {summary['remote']['avg_ms']:.0f} ms\n"
+                f"置信度阈值: {self.threshold}")
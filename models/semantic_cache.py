@@ -0,0 +1,129 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# 比较问题时忽略的虚词。否定词、代词、疑问词和数字都保留，它们会改变问题的意思
+_STOPWORDS = frozenset("""
+    a an the is are was were be been am do does did to of please can could would
+    的 了 吗 呢 吧 啊 呀 请
+""".split())
+# 不影响问题意思的标点，运算符（+ - * / 等）不在其中
+_PUNCTUATION = frozenset(".,!?;:'\"，。！？；：、“”‘’（）()[]【】…~·")
+# 英文单词与数字各算一个词，其他文字和符号每个字符算一个词
+_TERM = re.compile(r"[a-z0-9]+|\w|[^\w\s]")
+
+
+def question_key(text):
+    """问题的规范形式：小写，去掉标点和虚词，保留原来的词序
+
+    只差一个词的问题（ascending 与 descending、World War I 与 II、
+    1234*5678 与 1234*5679、猫与狗）得到不同的键，只有大小写、标点、
+    空白或虚词不同的问题得到相同的键。
+    """
+    terms = (term for term in _TERM.findall(text.lower())
+             if term not in _STOPWORDS and term not in _PUNCTUATION)
+    return " ".join(terms)
+
+
+class SemanticCache:
+    """单轮问题的答案缓存，按规范化后的问题精确匹配
+
+    键是 question_key() 的结果，所以只有写法不同的同一个问题才会命中，
+    换一种说法的问题（“怎么重置密码”与“忘记密码了怎么办”）不会命中：
+    可靠地识别同义改写需要嵌入模型，字符 n-gram 向量分不清只差一个词的
+    问题，也就无法用阈值区分同义改写与意思不同的问题。
+
+    条目数超过 max_entries 时淘汰最久未被使用的条目。数据保存在
+    path + ".json" 中，启动时自动加载。namespace 区分模型与系统提示词，
+    不同设置下的答案不会混用。
+    """
+
+    def __init__(self, path="semantic_cache", max_entries=2000, save_every=50):
+        self.path = path
+        self.max_entries = max_entries
+        self.save_every = save_every
+        self._lock = threading.Lock()
+
+        # (namespace, 问题的键) -> 条目，按使用时间从旧到新排列
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._unsaved = 0
+
+        self.load()
+
+    def lookup(self, question, namespace=""):
+        """返回缓存的答案，没有相同的问题时返回 None"""
+        key = (namespace, question_key(question))
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+            entry["last_used"] = time.time()
+            entry["hits"] += 1
+            return entry["answer"]
+
+    def add(self, question, answer, namespace=""):
+        """缓存一个问题的答案，满了以后替换最久未使用的条目"""
+        key = (namespace, question_key(question))
+        entry = {
+            "question": question,
+            "answer": answer,
+            "namespace": namespace,
+            "last_used": time.time(),
+            "hits": 0,
+        }
+        with self._lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+            self._unsaved += 1
+            save_now = self.save_every and self._unsaved >= self.save_every
+        if save_now:
+            self.save()
+
+    def save(self):
+        """写入磁盘，先写临时文件再替换，中途退出不会留下损坏的缓存"""
+        with self._lock:
+            entries = [dict(entry) for entry in self.entries.values()]
+            self._unsaved = 0
+
+        with open(self.path + ".json.tmp", "w", encoding="utf-8") as cache_file:
+            json.dump({"entries": entries}, cache_file, ensure_ascii=False)
+        os.replace(self.path + ".json.tmp", self.path + ".json")
+
+    def load(self):
+        if not os.path.exists(self.path + ".json"):
+            return
+        try:
+            with open(self.path + ".json", encoding="utf-8") as cache_file:
+                entries = json.load(cache_file).get("entries", [])
+        except (OSError, ValueError) as e:
+            print(f"无法加载问题缓存: {e}")
+            return
+
+        # 键按当前的规则重新计算，早期版本的向量文件（.npz）不再使用；
+        # 只保留最近使用的 max_entries 个条目
+        entries.sort(key=lambda entry: entry["last_used"])
+        with self._lock:
+            for entry in entries[-self.max_entries:]:
+                self.entries[(entry["namespace"], question_key(entry["question"]))] = entry
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+import time
+
+
+def apply_record(tabs, record):
+    """Apply one journal record to the session state (tab id -> tab dict)"""
+    op = record.get("op")
+    if op == "snapshot":
+        tabs.clear()
+        for tab in record["tabs"]:
+            tabs[tab["tab"]] = tab
+        return
+
+    tab_id = record.get("tab")
+    if op == "tab":
+        tab = tabs.setdefault(tab_id, {"tab": tab_id, "conversation_id": None,
+                                       "messages": [], "draft": ""})
+        tab["title"] = record["title"]
+        tab["advanced"] = record["advanced"]
+        return
+
+    # Records for a tab that was closed in the meantime are ignored
+    tab = tabs.get(tab_id)
+    if tab is None:
+        return
+    if op == "conversation":
+        tab["conversation_id"] = record["conversation_id"]
+    elif op == "message":
+        tab["messages"].append([record["role"], record["content"]])
+    elif op == "saved":
+        # Everything up to here is in the conversation store
+        tab["messages"] = []
+    elif op == "draft":
+        tab["draft"] = record["text"]
+    elif op == "close":
+        del tabs[tab_id]
+
+
+class SessionJournal:
+    """Crash-safe journal of the open tabs, their unsaved messages and drafts
+
+    Records are appended as JSON lines by a background thread, so typing
+    never waits for the disk. Draft edits are debounced: only the latest
+    text of each tab within the debounce interval is written. Once the file
+    holds compact_after records it is rewritten as a single snapshot.
+
+    The file is removed when the app closes normally, so finding it at
+    startup means the last session crashed; recover() rebuilds its state.
+    """
+
+    def __init__(self, path, tabs=None, debounce=0.5, compact_after=500):
+        self.path = path
+        self.debounce = debounce
+        self.compact_after = compact_after
+        self.tabs = {}
+        self._pending = []
+        self._drafts = {}
+        self._condition = threading.Condition()
+        self._closed = False
+
+        # Start from the recovered state so a second crash loses nothing
+        for tab in (tabs or {}).values():
+            self.tabs[tab["tab"]] = tab
+        self._file = None
+        self.compact()
+
+        self._thread = threading.Thread(target=self.run, daemon=True, name="SessionJournal")
+        self._thread.start()
+
+    @staticmethod
+    def recover(path):
+        """State left by a crashed session (tab id -> tab dict), or None"""
+        if not os.path.exists(path):
+            return None
+
+        tabs = {}
+        with open(path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line was cut off by the crash
+                    break
+                apply_record(tabs, record)
+        return tabs or None
+
+    def append(self, record):
+        with self._condition:
+            self._pending.append(record)
+            self._condition.notify()
+
+    def open_tab(self, tab_id, title, advanced):
+        self.append({"op": "tab", "tab": tab_id, "title": title, "advanced": advanced})
+
+    def set_conversation(self, tab_id, conversation_id):
+        self.append({"op": "conversation", "tab": tab_id, "conversation_id": conversation_id})
+
+    def add_message(self, tab_id, role, content):
+        self.append({"op": "message", "tab": tab_id, "role": role, "content": content})
+
+    def mark_saved(self, tab_id):
+        self.append({"op": "saved", "tab": tab_id})
+
+    def close_tab(self, tab_id):
+        self.append({"op": "close", "tab": tab_id})
+
+    def set_draft(self, tab_id, text):
+        """Called on every edit, only the latest text is kept until the next write"""
+        with self._condition:
+            self._drafts[tab_id] = text
+            self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not (self._pending or self._drafts or self._closed):
+                    self._condition.wait()
+                # Let a burst of keystrokes collapse into one record
+                deadline = time.monotonic() + self.debounce
+                while not self._closed and time.monotonic() < deadline:
+                    self._condition.wait(deadline - time.monotonic())
+                records = self._pending
+                records += [{"op": "draft", "tab": tab_id, "text": text}
+                            for tab_id, text in self._drafts.items()]
+                self._pending = []
+                self._drafts = {}
+                closed = self._closed
+
+            if records:
+                self.write(records)
+            if closed:
+                self._file.close()
+                return
+
+    def write(self, records):
+        self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        for record in records:
+            apply_record(self.tabs, record)
+
+        self.records += len(records)
+        if self.records >= self.compact_after:
+            self.compact()
+
+    def compact(self):
+        """Replace the journal with one snapshot of the current state"""
+        if self._file:
+            self._file.close()
+        snapshot = {"op": "snapshot", "tabs": list(self.tabs.values())}
+        with open(self.path + ".tmp", "w", encoding="utf-8") as journal:
+            journal.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(self.path + ".tmp", self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self.records = 1
+
+    def close(self, clean=True):
+        """Write what is pending and stop; a clean close removes the journal"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if clean and os.path.exists(self.path):
+            os.remove(self.path)
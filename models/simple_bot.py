@@ -16,6 +16,17 @@ class SimpleBot:
             r'gpu|cuda': ['GPU support is required for advanced features. Please install necessary drivers.'],
             r'login|account|register': ['You can manage your account from the login screen.']
         }
+        # Stable ids for the patterns, used when classifying logs in batch
+        self.rule_ids = {
+            r'hello|hi|hey': 'greeting',
+            r'how are you': 'how_are_you',
+            r'bye|goodbye': 'goodbye',
+            r'help': 'help',
+            r'api|key|deepseek': 'api_key',
+            r'gpu|cuda': 'gpu',
+            r'login|account|register': 'account',
+        }
+        self.rules = [(self.rule_ids[pattern], re.compile(pattern)) for pattern in self.patterns]
         self.default_responses = [
             "I'm a simple assistant with limited functionality. For advanced features, please provide a valid API key and ensure GPU support.",
             "I understand your message, but I have limited capabilities. Advanced features require API key and GPU support.",
@@ -35,6 +46,40 @@ class SimpleBot:
 
         return random.choice(self.default_responses)
 
+    def classify(self, user_input):
+        """Id of the rule get_response would answer with, without the random reply
+
+        Returns "command" for commands and "default" when no pattern matches.
+        """
+        if user_input.startswith("/"):
+            return "command"
+
+        user_input = user_input.lower()
+        for rule_id, regex in self.rules:
+            if regex.search(user_input):
+                return rule_id
+        return "default"
+
+    def match(self, user_input):
+        """Return the best matching pattern and how confident the match is (0-1)
+
+        Confidence is the share of the message covered by the pattern, so a
+        bare "hi" is a certain greeting while "hi, explain quantum physics" is not.
+        """
+        text = user_input.lower().strip()
+        letters = sum(len(word) for word in re.findall(r'\w+', text))
+        if not letters:
+            return None, 0.0
+
+        best_pattern, best_confidence = None, 0.0
+        for pattern in self.patterns:
+            matched = sum(len(m.group()) for m in re.finditer(r'\b(?:%s)\b' % pattern, text))
+            confidence = min(1.0, matched / letters)
+            if confidence > best_confidence:
+                best_pattern, best_confidence = pattern, confidence
+
+        return best_pattern, best_confidence
+
     def handle_command(self, command):
         cmd = command.lower().strip()
 
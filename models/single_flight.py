@@ -0,0 +1,80 @@
+import threading
+
+
+class Flight:
+    """一个正在进行的请求，相同请求的调用方订阅它的输出"""
+
+    def __init__(self):
+        self.chunks = []
+        self.followers = 0
+        self.done = False
+        self.truncated = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def publish(self, chunk):
+        """发布一段回复内容"""
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def subscribe(self, cancel_event=None):
+        """按顺序产出全部回复内容（包括订阅前已经收到的部分），直到请求结束"""
+        index = 0
+        while True:
+            with self.condition:
+                while index == len(self.chunks) and not self.done:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    self.condition.wait(0.1)
+                pending = self.chunks[index:]
+                done = self.done
+            index += len(pending)
+            yield from pending
+            if done and index == len(self.chunks):
+                return
+
+    def leave(self):
+        """订阅方不再需要结果，最后一个订阅方离开后发起方被取消时可以立即停止"""
+        with self.condition:
+            self.followers -= 1
+
+
+class SingleFlight:
+    """合并同时进行的相同请求
+
+    第一个调用方负责网络请求，其余相同指纹的调用方只订阅它的结果。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.leader_calls = 0
+        self.calls_saved = 0
+
+    def join(self, key):
+        """加入指纹为 key 的请求，返回 (flight, 是否需要自己发起请求)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = Flight()
+                self._flights[key] = flight
+                self.leader_calls += 1
+                return flight, True
+
+            flight.followers += 1
+            self.calls_saved += 1
+            return flight, False
+
+    def finish(self, key, flight):
+        """请求结束，通知所有订阅方"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        with flight.condition:
+            flight.done = True
+            flight.condition.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {"leader_calls": self.leader_calls, "calls_saved": self.calls_saved}
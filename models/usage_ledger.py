@@ -0,0 +1,285 @@
+"""Per-user token usage and quotas
+
+Usage is counted in memory and written behind to the usage table in one
+batched transaction every flush_interval seconds and on close, so saving
+a reply never waits for SQLite. Quota checks only read the in-memory
+monthly totals; quotas are reloaded from the database on every flush.
+
+Command line usage:
+
+    python -m models.usage_ledger report --month 2024-05
+    python -m models.usage_ledger quota alice --tokens 2000000 --cost 5
+"""
+import argparse
+import datetime
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger("chatbot.usage")
+
+# USD per million tokens: (prompt cache hit, prompt cache miss, completion).
+# Update when the API pricing changes.
+PRICES = {
+    "deepseek-chat": (0.07, 0.27, 1.10),
+    "deepseek-reasoner": (0.14, 0.55, 2.19),
+}
+
+
+class QuotaExceededError(Exception):
+    """The user has used up the monthly token or cost quota"""
+
+
+def usage_cost(model, prompt_tokens, cache_hit_tokens, completion_tokens):
+    hit_price, miss_price, completion_price = PRICES.get(model, PRICES["deepseek-chat"])
+    return (cache_hit_tokens * hit_price
+            + (prompt_tokens - cache_hit_tokens) * miss_price
+            + completion_tokens * completion_price) / 1_000_000
+
+
+class UsageLedger:
+    """In-memory usage counters with write-behind to SQLite"""
+
+    def __init__(self, db_path="chatbot.db", flush_interval=30):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # (username, day, model) -> [requests, prompt, cache hit, completion, cost], not yet written
+        self._pending = {}
+        # username -> {"month", "tokens", "cost", "quota_tokens", "quota_cost"}
+        self._monthly = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.create_tables()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def create_tables(self):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usage (
+            username TEXT NOT NULL,
+            day TEXT NOT NULL,
+            model TEXT NOT NULL,
+            requests INTEGER NOT NULL DEFAULT 0,
+            prompt_tokens INTEGER NOT NULL DEFAULT 0,
+            cache_hit_tokens INTEGER NOT NULL DEFAULT 0,
+            completion_tokens INTEGER NOT NULL DEFAULT 0,
+            cost REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (username, day, model)
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usage_quotas (
+            username TEXT PRIMARY KEY,
+            monthly_tokens INTEGER,
+            monthly_cost REAL
+        )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def start(self):
+        """Flush periodically from a background thread"""
+        self._thread = threading.Thread(target=self.run, daemon=True, name="UsageLedger")
+        self._thread.start()
+
+    def run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.try_flush()
+
+    def close(self):
+        """Stop the flush thread and write what is still in memory"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        self.try_flush()
+
+    def try_flush(self):
+        """flush() that logs database errors instead of raising them
+
+        The counts of a failed flush stay pending, so the next flush writes
+        them. Used by the flush thread, which must survive a locked database.
+        """
+        try:
+            return self.flush()
+        except sqlite3.Error:
+            logger.exception("写入令牌用量失败，下次重试")
+            return 0
+
+    def _month_totals(self, username):
+        """Totals of the current month, loaded from the database once per user and month"""
+        month = datetime.date.today().strftime("%Y-%m")
+        totals = self._monthly.get(username)
+        if totals and totals["month"] == month:
+            return totals
+
+        conn = self.connect()
+        tokens, cost = conn.execute(
+            "SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0), COALESCE(SUM(cost), 0) "
+            "FROM usage WHERE username = ? AND day LIKE ?",
+            (username, month + "-%")
+        ).fetchone()
+        quota = conn.execute(
+            "SELECT monthly_tokens, monthly_cost FROM usage_quotas WHERE username = ?", (username,)
+        ).fetchone() or (None, None)
+        conn.close()
+
+        # Usage recorded but not flushed yet is not in the database
+        for (pending_user, day, _model), counts in self._pending.items():
+            if pending_user == username and day.startswith(month):
+                tokens += counts[1] + counts[3]
+                cost += counts[4]
+
+        totals = {"month": month, "tokens": tokens, "cost": cost,
+                  "quota_tokens": quota[0], "quota_cost": quota[1]}
+        self._monthly[username] = totals
+        return totals
+
+    def record(self, username, model, prompt_tokens, cache_hit_tokens, completion_tokens):
+        """Count one request; nothing is written until the next flush"""
+        cost = usage_cost(model, prompt_tokens, cache_hit_tokens, completion_tokens)
+        day = datetime.date.today().isoformat()
+        with self._lock:
+            totals = self._month_totals(username)
+            totals["tokens"] += prompt_tokens + completion_tokens
+            totals["cost"] += cost
+
+            counts = self._pending.setdefault((username, day, model), [0, 0, 0, 0, 0.0])
+            counts[0] += 1
+            counts[1] += prompt_tokens
+            counts[2] += cache_hit_tokens
+            counts[3] += completion_tokens
+            counts[4] += cost
+
+    def check_quota(self, username):
+        """Raise QuotaExceededError when the user may not send another request"""
+        with self._lock:
+            totals = self._month_totals(username)
+        if totals["quota_tokens"] is not None and totals["tokens"] >= totals["quota_tokens"]:
+            raise QuotaExceededError(
+                f"本月令牌用量 {totals['tokens']} 已达到配额 {totals['quota_tokens']}")
+        if totals["quota_cost"] is not None and totals["cost"] >= totals["quota_cost"]:
+            raise QuotaExceededError(
+                f"本月费用 ${totals['cost']:.2f} 已达到配额 ${totals['quota_cost']:.2f}")
+
+    def month_summary(self, username):
+        with self._lock:
+            return dict(self._month_totals(username))
+
+    def set_quota(self, username, monthly_tokens=None, monthly_cost=None):
+        """Set or remove (None) the monthly limits of a user"""
+        conn = self.connect()
+        conn.execute(
+            "INSERT INTO usage_quotas (username, monthly_tokens, monthly_cost) VALUES (?, ?, ?) "
+            "ON CONFLICT (username) DO UPDATE SET monthly_tokens = excluded.monthly_tokens, "
+            "monthly_cost = excluded.monthly_cost",
+            (username, monthly_tokens, monthly_cost)
+        )
+        conn.commit()
+        conn.close()
+
+        with self._lock:
+            self._monthly.pop(username, None)
+
+    def reload_quotas(self):
+        """Pick up quotas changed by another process, e.g. the quota command"""
+        conn = self.connect()
+        try:
+            quotas = {row[0]: row[1:] for row in conn.execute(
+                "SELECT username, monthly_tokens, monthly_cost FROM usage_quotas")}
+        finally:
+            conn.close()
+
+        with self._lock:
+            for username, totals in self._monthly.items():
+                totals["quota_tokens"], totals["quota_cost"] = quotas.get(username, (None, None))
+
+    def flush(self):
+        """Reload the quotas and write the pending counters in one transaction"""
+        self.reload_quotas()
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        if not pending:
+            return 0
+
+        rows = [(username, day, model, *counts) for (username, day, model), counts in pending.items()]
+        conn = self.connect()
+        try:
+            conn.executemany('''
+            INSERT INTO usage (username, day, model, requests, prompt_tokens,
+                               cache_hit_tokens, completion_tokens, cost)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (username, day, model) DO UPDATE SET
+                requests = requests + excluded.requests,
+                prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                cache_hit_tokens = cache_hit_tokens + excluded.cache_hit_tokens,
+                completion_tokens = completion_tokens + excluded.completion_tokens,
+                cost = cost + excluded.cost
+            ''', rows)
+            conn.commit()
+        except sqlite3.Error:
+            # Keep the counts for the next attempt
+            with self._lock:
+                for key, counts in pending.items():
+                    merged = self._pending.setdefault(key, [0, 0, 0, 0, 0.0])
+                    for i, value in enumerate(counts):
+                        merged[i] += value
+            raise
+        finally:
+            conn.close()
+        return len(rows)
+
+    def billing_report(self, start_day, end_day):
+        """Usage per user between two ISO dates (inclusive), most expensive first"""
+        self.flush()
+        conn = self.connect()
+        cursor = conn.execute('''
+        SELECT username, SUM(requests), SUM(prompt_tokens), SUM(cache_hit_tokens),
+               SUM(completion_tokens), SUM(cost)
+        FROM usage
+        WHERE day BETWEEN ? AND ?
+        GROUP BY username
+        ORDER BY SUM(cost) DESC
+        ''', (start_day, end_day))
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [{"username": row[0], "requests": row[1], "prompt_tokens": row[2],
+                 "cache_hit_tokens": row[3], "completion_tokens": row[4], "cost": row[5]}
+                for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="令牌用量报表与配额设置")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    report_parser = subparsers.add_parser("report", help="按用户汇总一个月的用量")
+    report_parser.add_argument("--month", default=datetime.date.today().strftime("%Y-%m"),
+                               help="月份，例如 2024-05")
+    quota_parser = subparsers.add_parser("quota", help="设置用户的每月配额，不指定限额则取消配额")
+    quota_parser.add_argument("username")
+    quota_parser.add_argument("--tokens", type=int, help="每月令牌数上限")
+    quota_parser.add_argument("--cost", type=float, help="每月费用上限（美元）")
+    parser.add_argument("--db", default="chatbot.db", help="数据库文件")
+    args = parser.parse_args()
+
+    ledger = UsageLedger(args.db)
+    if args.action == "quota":
+        ledger.set_quota(args.username, args.tokens, args.cost)
+        print(f"已更新 {args.username} 的配额")
+        return
+
+    rows = ledger.billing_report(args.month + "-01", args.month + "-31")
+    print(f"{'用户':<20}{'请求':>8}{'提示词令牌':>14}{'缓存命中':>12}{'回复令牌':>12}{'费用(USD)':>12}")
+    for row in rows:
+        print(f"{row['username']:<20}{row['requests']:>8}{row['prompt_tokens']:>14}"
+              f"{row['cache_hit_tokens']:>12}{row['completion_tokens']:>12}{row['cost']:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import pytest
+
+from models.semantic_cache import SemanticCache, question_key
+
+# Questions that differ in one word, number or operator; the second question
+# must never get the first one's answer
+DIFFERENT_QUESTIONS = [
+    ("Write a function that sorts a list in ascending order",
+     "Write a function that sorts a list in descending order"),
+    ("What year did World War I end?", "What year did World War II end?"),
+    ("翻译成英文：我喜欢猫", "翻译成英文：我喜欢狗"),
+    ("who won the 2018 world cup", "who won the 2014 world cup"),
+    ("what is 1234*5678", "what is 1234*5679"),
+    ("what is 12+7", "what is 12-7"),
+    ("Is Python slower than C?", "Is Python not slower than C?"),
+    ("我能用这个命令吗", "我不能用这个命令吗"),
+    ("What is my name?", "What is your name?"),
+    ("How do I learn C++?", "How do I learn C#?"),
+    ("does the dog chase the cat", "does the cat chase the dog"),
+]
+
+# The same question written differently, must be served from the cache
+REWORDINGS = [
+    ("What year did World War II end?", "what year did world war ii end"),
+    ("How do I reverse a list in Python?", "how do i reverse a list in python"),
+    ("翻译成英文：我喜欢猫", "请翻译成英文：我喜欢猫。"),
+    ("what is 1234*5678", "What is the 1234 * 5678?"),
+]
+
+# Paraphrases need an embedding model, the cache does not claim to match them
+PARAPHRASES = [
+    ("how do I reset my password", "forgot password, what now"),
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticCache(str(tmp_path / "cache"), save_every=0)
+
+
+@pytest.mark.parametrize("cached, asked", DIFFERENT_QUESTIONS)
+def test_different_question_is_not_served(cache, cached, asked):
+    cache.add(cached, "answer")
+    assert cache.lookup(asked) is None
+
+
+@pytest.mark.parametrize("cached, asked", REWORDINGS)
+def test_rewording_is_served(cache, cached, asked):
+    cache.add(cached, "answer")
+    assert cache.lookup(asked) == "answer"
+
+
+@pytest.mark.parametrize("cached, asked", PARAPHRASES)
+def test_paraphrase_is_not_matched(cache, cached, asked):
+    cache.add(cached, "answer")
+    assert cache.lookup(asked) is None
+
+
+def test_key_keeps_operators_and_drops_punctuation():
+    assert question_key("What is 12 + 7?") == "what 12 + 7"
+
+
+def test_namespaces_are_separate(cache):
+    question = "What year did World War II end?"
+    cache.add(question, "1945", namespace="deepseek-chat")
+    assert cache.lookup(question, "deepseek-reasoner") is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = SemanticCache(str(tmp_path / "cache"), max_entries=2, save_every=0)
+    cache.add("first question", "1")
+    cache.add("second question", "2")
+    cache.lookup("first question")
+    cache.add("third question", "3")
+    assert cache.lookup("second question") is None
+    assert cache.lookup("first question") == "1"
+    assert cache.lookup("third question") == "3"
+
+
+def test_entries_survive_reload(tmp_path):
+    path = str(tmp_path / "cache")
+    first = SemanticCache(path, save_every=0)
+    first.add("What year did World War II end?", "1945")
+    first.save()
+
+    second = SemanticCache(path)
+    assert second.lookup("what year did world war ii end") == "1945"
+    assert second.lookup("What year did World War I end?") is None
@@ -0,0 +1,136 @@
+"""A local OpenAI-compatible chat completions server for load tests
+
+Replies are generated, never sent anywhere, so tests cost no tokens:
+
+    python -m tools.fake_openai_server --port 8765
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8765/v1 python main.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Set on the server: first_token_delay, token_delay, reply_tokens
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            # The client dropped a kept-alive connection
+            pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self.send_json(200, {"object": "list", "data": [
+                {"id": "deepseek-chat", "object": "model", "created": 0, "owned_by": "fake"}
+            ]})
+        else:
+            self.send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": "not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests += 1
+
+        prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", []))
+        tokens = [f"词{i} " for i in range(server.reply_tokens)]
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+            "prompt_cache_hit_tokens": 0,
+            "prompt_cache_miss_tokens": prompt_tokens,
+        }
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": request.get("model", "")}
+
+        time.sleep(server.first_token_delay)
+
+        if not request.get("stream"):
+            time.sleep(server.token_delay * len(tokens))
+            self.send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "".join(tokens)},
+            }]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(payload):
+            data = f"data: {payload}\n\n".encode()
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            for token in tokens:
+                send_event(json.dumps({**base, "object": "chat.completion.chunk", "choices": [{
+                    "index": 0, "finish_reason": None, "delta": {"content": token},
+                }]}))
+                time.sleep(server.token_delay)
+            send_event(json.dumps({**base, "object": "chat.completion.chunk", "choices": [{
+                "index": 0, "finish_reason": "stop", "delta": {},
+            }]}))
+            if (request.get("stream_options") or {}).get("include_usage"):
+                send_event(json.dumps({**base, "object": "chat.completion.chunk",
+                                       "choices": [], "usage": usage}))
+            send_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled the stream
+            pass
+
+
+def start_server(port=0, first_token_delay=0.2, token_delay=0.01, reply_tokens=100):
+    """Start the server in a background thread, returns it (server_port holds the port)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.first_token_delay = first_token_delay
+    server.token_delay = token_delay
+    server.reply_tokens = reply_tokens
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的OpenAI兼容接口")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="首个令牌前的延迟（秒）")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="令牌之间的延迟（秒）")
+    parser.add_argument("--reply-tokens", type=int, default=100, help="每个回复的令牌数")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.first_token_delay, args.token_delay, args.reply_tokens)
+    print(f"监听 http://127.0.0.1:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Headless multi-tab load test for ChatBotUI
+
+Opens N chat tabs on the offscreen Qt platform, sends scripted messages to
+a local fake OpenAI-compatible server and measures event-loop lag (QTimer
+drift), memory growth and per-tab reply latency. The JSON report can be
+compared with a report from another version:
+
+    python -m tools.load_test --tabs 20 --rate 0.5 --duration 30 --output report.json
+    python -m tools.load_test --tabs 20 --compare old_report.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Must be set before Qt is imported
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
+
+from tools.fake_openai_server import start_server
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarize(values):
+    """p50/p95/p99/max of a list of seconds, in milliseconds"""
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": max(values) * 1000 if values else 0.0,
+    }
+
+
+def current_rss():
+    """Resident memory of this process in bytes"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def repo_version():
+    try:
+        return subprocess.check_output(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class LagProbe:
+    """Measures how late a periodic QTimer fires, i.e. event-loop lag"""
+
+    def __init__(self, interval_ms=10):
+        self.interval = interval_ms / 1000
+        self.samples = []
+        self.last = None
+        self.timer = QTimer()
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        self.last = time.perf_counter()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        now = time.perf_counter()
+        self.samples.append(max(0.0, now - self.last - self.interval))
+        self.last = now
+
+
+class LoadTest:
+    def __init__(self, window, args):
+        self.window = window
+        self.args = args
+        self.tabs = []
+        self.sent = 0
+        self.skipped = 0
+        self.latencies = {}
+        self.first_token = {}
+        self.in_flight = 0
+        self.sending = True
+        self.lag_probe = LagProbe(args.probe_interval)
+        self.memory_samples = []
+
+    def setup(self):
+        # The window starts with one tab
+        while self.window.tab_widget.count() < self.args.tabs:
+            self.window.create_new_chat()
+        self.tabs = [self.window.tab_widget.widget(i) for i in range(self.window.tab_widget.count())]
+        for index in range(len(self.tabs)):
+            self.latencies[index] = []
+            self.first_token[index] = []
+
+    def start(self):
+        self.memory_start = current_rss()
+        self.lag_probe.start()
+
+        # One send timer per tab, staggered so the tabs do not fire together
+        interval_ms = int(1000 / self.args.rate)
+        self.send_timers = []
+        for index in range(len(self.tabs)):
+            timer = QTimer()
+            timer.setInterval(interval_ms)
+            timer.timeout.connect(lambda index=index: self.send(index))
+            QTimer.singleShot(int(index * interval_ms / len(self.tabs)), timer.start)
+            self.send_timers.append(timer)
+
+        self.memory_timer = QTimer()
+        self.memory_timer.timeout.connect(lambda: self.memory_samples.append(current_rss()))
+        self.memory_timer.start(500)
+
+        QTimer.singleShot(int(self.args.duration * 1000), self.stop_sending)
+
+    def send(self, index):
+        if not self.sending:
+            return
+
+        tab = self.tabs[index]
+        if tab.worker and tab.worker.isRunning():
+            self.skipped += 1
+            return
+
+        text = "你好，请介绍一下你自己" if self.args.identical else f"标签页 {index} 的第 {self.sent} 条消息"
+        tab.message_input.setPlainText(text)
+        start = time.perf_counter()
+        tab.send_message()
+        self.sent += 1
+
+        worker = tab.worker
+        if worker is None or not worker.isRunning():
+            return
+
+        self.in_flight += 1
+        first = []
+
+        def on_chunk(_chunk):
+            if not first:
+                first.append(True)
+                self.first_token[index].append(time.perf_counter() - start)
+
+        def on_done(_response, _truncated):
+            self.latencies[index].append(time.perf_counter() - start)
+            self.in_flight -= 1
+
+        worker.chunk_received.connect(on_chunk)
+        worker.response_ready.connect(on_done)
+
+    def stop_sending(self):
+        self.sending = False
+        for timer in self.send_timers:
+            timer.stop()
+        self.drain_deadline = time.perf_counter() + self.args.drain_timeout
+        self.wait_for_replies()
+
+    def wait_for_replies(self):
+        if self.in_flight > 0 and time.perf_counter() < self.drain_deadline:
+            QTimer.singleShot(100, self.wait_for_replies)
+            return
+        self.lag_probe.stop()
+        self.memory_timer.stop()
+        QApplication.instance().quit()
+
+    def report(self):
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        all_first_token = [value for values in self.first_token.values() for value in values]
+        memory_end = current_rss()
+        return {
+            "version": repo_version(),
+            "config": vars(self.args),
+            "messages_sent": self.sent,
+            "messages_skipped_busy": self.skipped,
+            "replies_completed": len(all_latencies),
+            "replies_unfinished": self.in_flight,
+            "event_loop_lag": summarize(self.lag_probe.samples),
+            "reply_latency": summarize(all_latencies),
+            "first_token_latency": summarize(all_first_token),
+            "per_tab_reply_latency": {str(index): summarize(values)
+                                      for index, values in self.latencies.items()},
+            "memory": {
+                "start_mb": self.memory_start / 2 ** 20,
+                "end_mb": memory_end / 2 ** 20,
+                "peak_mb": max(self.memory_samples + [memory_end]) / 2 ** 20,
+                "growth_mb": (memory_end - self.memory_start) / 2 ** 20,
+            },
+        }
+
+
+def compare(report, baseline):
+    """Print the main metrics next to a baseline report"""
+    rows = [
+        ("event_loop_lag", "p99_ms"), ("event_loop_lag", "max_ms"),
+        ("reply_latency", "p50_ms"), ("reply_latency", "p99_ms"),
+        ("first_token_latency", "p50_ms"), ("first_token_latency", "p99_ms"),
+        ("memory", "growth_mb"), ("memory", "peak_mb"),
+    ]
+    print(f"{'指标':<32}{baseline['version']:>16}{report['version']:>16}")
+    for section, key in rows:
+        old = baseline.get(section, {}).get(key, 0.0)
+        new = report[section][key]
+        print(f"{section + '.' + key:<32}{old:>16.1f}{new:>16.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChatBotUI 多标签页负载测试")
+    parser.add_argument("--tabs", type=int, default=20, help="标签页数量")
+    parser.add_argument("--rate", type=float, default=0.5, help="每个标签页每秒发送的消息数")
+    parser.add_argument("--duration", type=float, default=30, help="发送消息的时长（秒）")
+    parser.add_argument("--drain-timeout", type=float, default=30, help="停止发送后等待回复的时长（秒）")
+    parser.add_argument("--identical", action="store_true", help="所有标签页发送相同的消息")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="模拟服务首个令牌延迟（秒）")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="模拟服务令牌间隔（秒）")
+    parser.add_argument("--reply-tokens", type=int, default=100, help="模拟服务每个回复的令牌数")
+    parser.add_argument("--probe-interval", type=int, default=10, help="事件循环探针间隔（毫秒）")
+    parser.add_argument("--output", default="load_test_report.json", help="报告文件")
+    parser.add_argument("--compare", help="用于对比的旧报告")
+    args = parser.parse_args()
+
+    server = start_server(0, args.first_token_delay, args.token_delay, args.reply_tokens)
+    os.environ["DEEPSEEK_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    app = QApplication(sys.argv)
+
+    # Imported after QApplication and the base URL are set up
+    from ui.main_window import ChatBotUI
+    from ui.theme import apply_stylesheet
+    apply_stylesheet(app)
+
+    class HeadlessChatBotUI(ChatBotUI):
+        """ChatBotUI logged in as a test user, with advanced mode forced on"""
+
+        def check_login(self):
+            self.username = "loadtest"
+            self.api_key = "fake-key"
+            self.use_advanced = True
+
+    # Keep the test database away from the real one
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        window = HeadlessChatBotUI()
+
+        test = LoadTest(window, args)
+        test.setup()
+        test.start()
+        app.exec_()
+
+        # Cancels the tabs' requests and waits for their threads
+        window.close()
+
+    report = test.report()
+    report["server_requests"] = server.requests
+    server.shutdown()
+
+    with open(output, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
+
+    print(f"报告已写入 {output}")
+    print(f"事件循环延迟 p99: {report['event_loop_lag']['p99_ms']:.1f} ms，"
+          f"回复延迟 p50: {report['reply_latency']['p50_ms']:.0f} ms，"
+          f"内存增长: {report['memory']['growth_mb']:.1f} MB")
+
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as baseline_file:
+            compare(report, json.load(baseline_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QTabWidget,
                              QPushButton, QMessageBox, QHBoxLayout)
 from PyQt5.QtCore import pyqtSignal, Qt
-from PyQt5.QtGui import QIcon
+
+from ui.theme import icon
 
 
 class BotSelector(QWidget):
@@ -30,12 +31,12 @@ class BotSelector(QWidget):
 
         # Title
         select_label = QLabel("选择机器人")
-        select_label.setStyleSheet("font-weight: bold; font-size: 14px;")
+        select_label.setObjectName("selectorTitle")
         header_layout.addWidget(select_label)
 
         # Collapse/expand button
         self.collapse_btn = QPushButton()
-        self.collapse_btn.setIcon(QIcon("icons/collapse.png"))
+        self.collapse_btn.setIcon(icon("collapse"))
         self.collapse_btn.setToolTip("折叠面板")
         self.collapse_btn.setFixedSize(24, 24)
         self.collapse_btn.clicked.connect(self.toggle_collapse)
@@ -54,7 +55,7 @@ class BotSelector(QWidget):
         simple_bot_info.setWordWrap(True)
         simple_bot_layout.addWidget(simple_bot_info)
         simple_bot_layout.addStretch()
-        self.bot_tabs.addTab(simple_bot_widget, QIcon("icons/simple_bot.png"), "简易")
+        self.bot_tabs.addTab(simple_bot_widget, icon("simple_bot"), "简易")
 
         # Advanced bot tab
         ds_bot_widget = QWidget()
@@ -63,7 +64,7 @@ class BotSelector(QWidget):
         ds_bot_info.setWordWrap(True)
         ds_bot_layout.addWidget(ds_bot_info)
         ds_bot_layout.addStretch()
-        self.bot_tabs.addTab(ds_bot_widget, QIcon("icons/advanced_bot.png"), "高级")
+        self.bot_tabs.addTab(ds_bot_widget, icon("advanced_bot"), "高级")
 
         # Connect bot selection signal
         self.bot_tabs.currentChanged.connect(self.change_bot_type)
@@ -75,6 +76,13 @@ class BotSelector(QWidget):
         self.api_btn.clicked.connect(self.request_api_settings)
         layout.addWidget(self.api_btn)
 
+        # Result of the background API key check, see set_key_status()
+        self.key_status_label = QLabel()
+        self.key_status_label.setObjectName("keyStatus")
+        self.key_status_label.setWordWrap(True)
+        self.key_status_label.setVisible(False)
+        layout.addWidget(self.key_status_label)
+
         layout.addStretch()
         self.setLayout(layout)
 
@@ -86,15 +94,17 @@ class BotSelector(QWidget):
         self.is_collapsed = not self.is_collapsed
 
         if self.is_collapsed:
-            self.collapse_btn.setIcon(QIcon("icons/expand.png"))
+            self.collapse_btn.setIcon(icon("expand"))
             self.collapse_btn.setToolTip("展开面板")
             self.bot_tabs.setVisible(False)
             self.api_btn.setVisible(False)
+            self.key_status_label.setVisible(False)
         else:
-            self.collapse_btn.setIcon(QIcon("icons/collapse.png"))
+            self.collapse_btn.setIcon(icon("collapse"))
             self.collapse_btn.setToolTip("折叠面板")
             self.bot_tabs.setVisible(True)
             self.api_btn.setVisible(True)
+            self.key_status_label.setVisible(bool(self.key_status_label.text()))
 
         # Emit signal to notify parent to adjust splitter sizes
         self.collapse_requested.emit(self.is_collapsed)
@@ -102,7 +112,6 @@ class BotSelector(QWidget):
     def change_bot_type(self, index):
         """Change the bot type based on tab selection"""
         print(f"触发切换，索引: {index}")
-        self.bot_changed.emit(self.current_bot_type)
         self.current_bot_type = "advanced" if index == 1 else "simple"
 
         # If advanced selected but not available, show warning
@@ -127,6 +136,20 @@ class BotSelector(QWidget):
 
         # If current bot is advanced but advanced mode is not available, switch to simple
         if self.current_bot_type == "advanced" and not use_advanced:
+            # change_bot_type() updates the type and emits bot_changed
             self.bot_tabs.setCurrentIndex(0)
-            self.current_bot_type = "simple"
-            self.bot_changed.emit(self.current_bot_type)
\ No newline at end of file
+    def set_key_status(self, state, message):
+        """Show the API key check result: checking, valid, invalid or unreachable"""
+        texts = {
+            "checking": "正在验证API密钥…",
+            "valid": "API密钥有效",
+            "invalid": "API密钥无效",
+            "unreachable": "无法连接API",
+        }
+        self.key_status_label.setText(texts.get(state, state))
+        self.key_status_label.setToolTip(message)
+        # The stylesheet colors the label by this property
+        self.key_status_label.setProperty("state", state)
+        self.key_status_label.style().unpolish(self.key_status_label)
+        self.key_status_label.style().polish(self.key_status_label)
+        self.key_status_label.setVisible(not self.is_collapsed)
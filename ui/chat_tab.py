@@ -1,33 +1,81 @@
+import sqlite3
+import time
 import torch
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                            QTextEdit, QLabel, QMessageBox, QApplication)
-from PyQt5.QtGui import QIcon
-from models.DS_bot import DS_Bot
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import QIcon, QTextCharFormat
+from models.DS_bot import DS_Bot, TRUNCATED_MARKER, is_connection_error
 from models.simple_bot import SimpleBot
+from models.router import QueryRouter
 from ui.custom_widgets import MessageInput
+from ui.workers import ResponseWorker
 
 class ChatTab(QWidget):
-    def __init__(self, parent=None, api_key="", title="新对话", use_advanced=True):
+    message_queued = pyqtSignal(int)  # Emitted with the conversation id when a message goes to the outbox
+
+    def __init__(self, parent=None, api_key="", title="新对话", use_advanced=True,
+                 store=None, username="", conversation_id=None, outbox=None,
+                 router_threshold=0.7, semantic_cache=None, profiler=None,
+                 journal=None, journal_id=None, usage_ledger=None):
         """Individual chat tab"""
         super().__init__(parent)
         self.title = title
         self.api_key = api_key
         self.bot = None
         self.use_advanced = use_advanced
+        self.worker = None
+        self.reply_started = False
+        self.request_started = 0.0
 
-        # Create bot instance
-        if use_advanced and api_key:
-            try:
-                self.bot = DS_Bot(api_key=self.api_key)
-            except Exception as e:
-                QMessageBox.warning(self, "错误", f"初始化高级机器人时出错: {str(e)}")
-                self.bot = SimpleBot()
-        else:
-            self.bot = SimpleBot()
+        # Simple questions in advanced mode are answered locally
+        self.router = None
+        self.router_threshold = router_threshold
+
+        # Shared cache of answers to near-identical first questions
+        self.semantic_cache = semantic_cache
+
+        # App-wide sampling profiler driven by /profile start|stop
+        self.profiler = profiler
+
+        # Per-user token usage and quotas, shared by all tabs
+        self.usage_ledger = usage_ledger
+
+        # Crash recovery journal (SessionJournal) and this tab's id in it
+        self.journal = journal
+        self.journal_id = journal_id
+
+        # Saved conversation backing this tab, created on the first message
+        self.store = store
+        self.username = username
+        self.conversation_id = conversation_id
+        self.anchored_ids = set()
+        # Messages whose save failed, as (role, content), retried with the next exchange
+        self.unsaved = []
+
+        # Messages of this conversation waiting in the outbox for the network
+        self.outbox = outbox
+        self.pending_outbox = 0
+        if self.outbox and self.conversation_id:
+            self.pending_outbox = self.outbox.pending_count(self.conversation_id)
+
+        # One bot per mode, kept for the life of the tab so switching modes keeps the context
+        self.bots = {}
+        self.select_bot(use_advanced)
 
         # Create UI
         self.init_ui()
 
+        # Reopen a saved conversation
+        if self.store and self.conversation_id:
+            self.load_history()
+
+        if self.journal:
+            self.journal.open_tab(self.journal_id, self.title, self.use_advanced)
+            if self.conversation_id:
+                self.journal.set_conversation(self.journal_id, self.conversation_id)
+            self.message_input.textChanged.connect(self.on_draft_changed)
+
     def init_ui(self):
         """Initialize chat UI"""
         layout = QVBoxLayout()
@@ -36,10 +84,10 @@ class ChatTab(QWidget):
         status_layout = QHBoxLayout()
         if self.use_advanced:
             status_label = QLabel("高级模式 ✓")
-            status_label.setStyleSheet("color: green; font-weight: bold;")
+            status_label.setObjectName("advancedStatus")
         else:
             status_label = QLabel("简易模式 ⚠")
-            status_label.setStyleSheet("color: orange; font-weight: bold;")
+            status_label.setObjectName("simpleStatus")
         status_layout.addWidget(status_label)
         status_layout.addStretch()
         layout.addLayout(status_layout)
@@ -48,7 +96,7 @@ class ChatTab(QWidget):
         self.chat_history = QTextEdit()
         self.chat_history.setReadOnly(True)
         self.chat_history.setAcceptRichText(True)
-        self.chat_history.setStyleSheet("background-color: #f5f5f5; border-radius: 5px;")
+        self.chat_history.setObjectName("chatHistory")
         layout.addWidget(self.chat_history)
 
         # Input area
@@ -57,25 +105,23 @@ class ChatTab(QWidget):
         self.message_input = MessageInput(self)
         self.message_input.setPlaceholderText("输入消息...")
         self.message_input.setMaximumHeight(100)
-        self.message_input.setStyleSheet("border-radius: 5px;")
+        self.message_input.setObjectName("messageInput")
         input_layout.addWidget(self.message_input, 4)
 
         # Send button
-        send_button = QPushButton("发送")
-        send_button.setMinimumHeight(40)
-        send_button.clicked.connect(self.send_message)
-        send_button.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border-radius: 5px;
-                padding: 5px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-        """)
-        input_layout.addWidget(send_button, 1)
+        self.send_button = QPushButton("发送")
+        self.send_button.setMinimumHeight(40)
+        self.send_button.clicked.connect(self.send_message)
+        self.send_button.setObjectName("sendButton")
+        input_layout.addWidget(self.send_button, 1)
+
+        # Stop button, only visible while a reply is streaming
+        self.stop_button = QPushButton("停止")
+        self.stop_button.setMinimumHeight(40)
+        self.stop_button.clicked.connect(self.stop_response)
+        self.stop_button.setObjectName("stopButton")
+        self.stop_button.setVisible(False)
+        input_layout.addWidget(self.stop_button, 1)
 
         layout.addLayout(input_layout)
         self.setLayout(layout)
@@ -91,56 +137,303 @@ class ChatTab(QWidget):
             QMessageBox.warning(self, "错误", "机器人未初始化")
             return
 
+        # Only one request per tab at a time
+        if self.worker and self.worker.isRunning():
+            return
+
         message = self.message_input.toPlainText().strip()
         if not message:
             return
 
         # Display user message
-        self.chat_history.append(f"<div style='text-align: right;'><b>您:</b> {message}</div>")
+        self.chat_history.append(self.format_message(None, "user", message))
         self.message_input.clear()
+        if self.journal and not message.startswith("/"):
+            self.journal.add_message(self.journal_id, "user", message)
+
+        # The profiler samples the whole app, so this is handled here and not by the bot
+        if self.profiler and message.lower().split()[0] == "/profile":
+            reply = self.profiler.handle_command(message).replace("\n", "<br>")
+            self.chat_history.append(f"<b>机器人:</b> {reply}")
+            self.scroll_to_bottom()
+            return
+
+        # Keep the order of the conversation while earlier messages are still queued
+        if isinstance(self.bot, DS_Bot) and self.pending_outbox:
+            if message.startswith("/"):
+                # Commands such as /clear would act on a context the queued messages are missing
+                self.add_system_message("队列中还有消息等待发送，发送完成后才能使用命令。")
+            else:
+                self.queue_message(message)
+            return
 
         # Get and display bot reply
         self.chat_history.append("<b>机器人:</b> <i>思考中...</i>")
         QApplication.processEvents()  # Update UI
 
+        if isinstance(self.bot, DS_Bot):
+            # Answer locally when SimpleBot is confident enough
+            local_reply = self.router.try_local(message)
+            if local_reply is not None:
+                self.remove_last_line()
+                self.chat_history.append(f"<b>机器人:</b> {local_reply}")
+                self.save_exchange(message, local_reply)
+                self.scroll_to_bottom()
+                return
+
+            # Stream the reply from a worker thread so it can be stopped
+            self.reply_started = False
+            self.request_started = time.perf_counter()
+            self.worker = ResponseWorker(self.bot, message, self)
+            self.worker.chunk_received.connect(self.on_reply_chunk)
+            self.worker.response_ready.connect(self.on_response_ready)
+            self.send_button.setVisible(False)
+            self.stop_button.setVisible(True)
+            self.worker.start()
+            return
+
         try:
-            if isinstance(self.bot, DS_Bot):
-                response = self.bot.get_response(message)
-            else:
-                response = self.bot.get_response(message)
+            response = self.bot.get_response(message)
 
             # Update the last line, remove "thinking..." and add reply
-            cursor = self.chat_history.textCursor()
-            cursor.movePosition(cursor.End)
-            cursor.select(cursor.LineUnderCursor)
-            cursor.removeSelectedText()
-            cursor.deletePreviousChar()  # Delete extra newline
+            self.remove_last_line()
             self.chat_history.append(f"<b>机器人:</b> {response}")
+            self.save_exchange(message, response)
+
+            # Keep the advanced bot's context complete for when the user switches back
+            advanced_bot = self.bots.get("advanced")
+            if advanced_bot and not message.startswith("/"):
+                advanced_bot.add_message("user", message)
+                advanced_bot.add_message("assistant", response)
 
         except Exception as e:
             self.chat_history.append(f"<b>错误:</b> {str(e)}")
 
-        # Scroll to bottom
+        self.scroll_to_bottom()
+
+    def on_reply_chunk(self, chunk):
+        """Append a streamed piece of the reply"""
+        if not self.reply_started:
+            self.reply_started = True
+            self.remove_last_line()
+            self.chat_history.append("<b>机器人:</b> ")
+
+        cursor = self.chat_history.textCursor()
+        cursor.movePosition(cursor.End)
+        cursor.setCharFormat(QTextCharFormat())
+        cursor.insertText(chunk)
+        self.scroll_to_bottom()
+
+    def on_response_ready(self, response, truncated):
+        """Finish the reply once the worker is done"""
+        self.stop_button.setVisible(False)
+        self.send_button.setVisible(True)
+
+        # Network is down, keep the message and send it once it is back
+        if self.worker.failed and is_connection_error(self.worker.bot.last_error):
+            self.remove_last_line()
+            self.reply_started = False
+            self.queue_message(self.worker.message)
+            return
+
+        if not self.reply_started:
+            # Nothing was streamed (error or stopped early), show the result in one go
+            self.remove_last_line()
+            self.chat_history.append(f"<b>机器人:</b> {response}")
+        if truncated:
+            self.chat_history.append("<i>(回复已中断)</i>")
+        elif getattr(self.worker.bot, "last_cached", False):
+            self.chat_history.append("<i>(来自相同问题的缓存回答)</i>")
+
+        if not self.worker.failed:
+            if self.router:
+                self.router.record("remote", time.perf_counter() - self.request_started)
+            self.save_exchange(self.worker.message,
+                               f"{response}\n{TRUNCATED_MARKER}" if truncated else response)
+
+        self.reply_started = False
+        self.scroll_to_bottom()
+
+    def queue_message(self, message):
+        """Put a message in the outbox until the API is reachable again"""
+        if not self.outbox or not self.store:
+            self.chat_history.append("<b>机器人:</b> 网络不可用，请稍后重试。")
+            return
+
+        self.ensure_conversation()
+        self.outbox.enqueue(self.conversation_id, self.username, message)
+        self.pending_outbox += 1
+        if self.journal:
+            # The outbox keeps the message from now on
+            self.journal.mark_saved(self.journal_id)
+        self.chat_history.append("<i>网络不可用，消息已加入发送队列，连接恢复后将自动发送。</i>")
+        self.scroll_to_bottom()
+        self.message_queued.emit(self.conversation_id)
+
+    def show_outbox_reply(self, message, reply, error):
+        """Show the reply to a message that was sent from the outbox"""
+        self.pending_outbox = max(0, self.pending_outbox - 1)
+        preview = message if len(message) <= 20 else message[:20] + "..."
+        if error:
+            self.chat_history.append(f"<b>错误:</b> 队列中的消息“{preview}”发送失败: {error}")
+        else:
+            self.chat_history.append(f"<i>队列中的消息“{preview}”已发送</i>")
+            self.chat_history.append(f"<b>机器人:</b> {reply}")
+            # The reply came from a separate bot, the tab's own bot gets the exchange as context
+            advanced_bot = self.bots.get("advanced")
+            if advanced_bot:
+                advanced_bot.add_message("user", message)
+                advanced_bot.add_message("assistant", reply)
+        self.scroll_to_bottom()
+
+    def stop_response(self):
+        """Abort the reply that is currently streaming"""
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+
+    def shutdown(self):
+        """Abort any running request before the tab is closed
+
+        The worker stops on its own shortly after cancel(), or keeps
+        streaming for other tabs sharing the request, so it is detached
+        instead of waited for on the GUI thread.
+        """
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.detach()
+
+    def ensure_conversation(self):
+        """Create the saved conversation on first use"""
+        if not self.conversation_id:
+            self.conversation_id = self.store.create_conversation(self.username, self.title)
+            if self.journal:
+                self.journal.set_conversation(self.journal_id, self.conversation_id)
+        return self.conversation_id
+
+    def save_exchange(self, message, reply):
+        """Save a message and its reply, commands are not saved
+
+        When the database stays locked, e.g. by a long import in another
+        process, the exchange is kept and saved together with the next one.
+        """
+        if not self.store or message.startswith("/"):
+            return
+
+        self.unsaved.append(("user", message))
+        self.unsaved.append(("assistant", reply))
+        try:
+            self.ensure_conversation()
+            self.store.add_messages(self.conversation_id, self.unsaved)
+        except sqlite3.Error as e:
+            self.add_system_message(f"保存对话失败，将在下一条消息后重试: {str(e)}")
+            return
+
+        self.unsaved = []
+        if self.journal:
+            self.journal.mark_saved(self.journal_id)
+
+    def on_draft_changed(self):
+        """Journal the unsent text, the journal debounces the writes"""
+        self.journal.set_draft(self.journal_id, self.message_input.toPlainText())
+
+    def restore_unsaved(self, messages, draft):
+        """Show messages that never got a reply before a crash, they are not sent again"""
+        for role, content in messages:
+            self.chat_history.append(self.format_message(None, role, content))
+            if role == "user":
+                self.chat_history.append("<i>(上次程序意外退出，此消息没有收到回复，未重新发送)</i>")
+        if draft:
+            self.message_input.setPlainText(draft)
+        self.scroll_to_bottom()
+
+    def format_message(self, message_id, role, content):
+        """HTML for one message, with an anchor so searches can jump to it"""
+        anchor = ""
+        if message_id:
+            anchor = f"<a name='msg-{message_id}'></a>"
+            self.anchored_ids.add(message_id)
+
+        if role == "user":
+            return f"<div style='text-align: right;'>{anchor}<b>您:</b> {content}</div>"
+        return f"{anchor}<b>机器人:</b> {content}"
+
+    def load_history(self):
+        """Show the saved messages and restore them as bot context"""
+        messages = self.store.get_messages(self.conversation_id)
+
+        self.chat_history.clear()
+        self.anchored_ids.clear()
+        for message in messages:
+            self.chat_history.append(
+                self.format_message(message["id"], message["role"], message["content"]))
+
+        if isinstance(self.bot, DS_Bot) and len(self.bot.conversation_history) <= 1:
+            for message in messages:
+                self.bot.add_message(message["role"], message["content"])
+
+    def scroll_to_message(self, message_id):
+        """Scroll the chat history to a saved message"""
+        if message_id not in self.anchored_ids:
+            # Replies streamed in this session have no anchor yet
+            self.load_history()
+        self.chat_history.scrollToAnchor(f"msg-{message_id}")
+
+    def remove_last_line(self):
+        """Remove the last line of the chat history"""
+        cursor = self.chat_history.textCursor()
+        cursor.movePosition(cursor.End)
+        cursor.select(cursor.LineUnderCursor)
+        cursor.removeSelectedText()
+        cursor.deletePreviousChar()  # Delete extra newline
+
+    def scroll_to_bottom(self):
+        """Scroll the chat history to the bottom"""
         self.chat_history.verticalScrollBar().setValue(
             self.chat_history.verticalScrollBar().maximum())
 
+    def create_router(self):
+        """Route between a local SimpleBot and the DS_Bot, kept while in simple mode"""
+        if isinstance(self.bot, DS_Bot) and (self.router is None or self.router.ds_bot is not self.bot):
+            self.router = QueryRouter(SimpleBot(), self.bot, self.router_threshold)
+
+    def select_bot(self, use_advanced):
+        """Make the bot of a mode current, it is only created the first time"""
+        mode = "advanced" if use_advanced and self.api_key else "simple"
+        bot = self.bots.get(mode)
+        if bot is None and mode == "advanced":
+            try:
+                bot = DS_Bot(api_key=self.api_key, semantic_cache=self.semantic_cache,
+                             usage_ledger=self.usage_ledger, username=self.username)
+            except Exception as e:
+                QMessageBox.warning(self, "错误", f"初始化高级机器人时出错: {str(e)}")
+                mode = "simple"
+                bot = self.bots.get(mode)
+            else:
+                # Earlier messages of this tab, e.g. from simple mode, become context
+                if self.store and self.conversation_id:
+                    for message in self.store.get_messages(self.conversation_id):
+                        bot.add_message(message["role"], message["content"])
+        if bot is None:
+            bot = SimpleBot()
+
+        self.bots[mode] = bot
+        self.bot = bot
+        self.create_router()
+
     def update_api_key(self, api_key, use_advanced=True):
-        """Update API key and mode"""
+        """Update API key and mode, the bots and their history are kept"""
         self.api_key = api_key
         self.use_advanced = use_advanced
 
-        try:
-            if use_advanced and api_key:
-                self.bot = DS_Bot(api_key=self.api_key)
-            else:
-                self.bot = SimpleBot()
-        except Exception as e:
-            QMessageBox.warning(self, "错误", f"更新机器人时出错: {str(e)}")
-            self.bot = SimpleBot()
+        advanced_bot = self.bots.get("advanced")
+        if advanced_bot and api_key and api_key != advanced_bot.api_key:
+            advanced_bot.set_api_key(api_key)
+
+        self.select_bot(use_advanced)
+        if self.journal:
+            self.journal.open_tab(self.journal_id, self.title, use_advanced)
 
     def add_system_message(self, message):
         """Add a system message to the chat history"""
         self.chat_history.append(f"<b>系统提示:</b> {message}")
-        # Scroll to bottom
-        self.chat_history.verticalScrollBar().setValue(
-            self.chat_history.verticalScrollBar().maximum())
\ No newline at end of file
+        self.scroll_to_bottom()
\ No newline at end of file
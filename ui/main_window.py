@@ -1,38 +1,98 @@
 import os
+import re
 import sys
 import torch
+from urllib.parse import urlparse
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                            QPushButton, QLabel, QTabWidget, QSplitter,
-                           QMessageBox, QInputDialog, QLineEdit, QApplication)
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QIcon
+                           QMessageBox, QInputDialog, QLineEdit, QApplication,
+                           QFileDialog, QAction)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 
 from models.database import UserDatabase
+from models.conversation_store import ConversationStore
+from models.DS_bot import DS_Bot, resolve_base_url, is_connection_error, warm_up
+from models.outbox import Outbox, OutboxDrainer
+from models.session_journal import SessionJournal
+from models.usage_ledger import UsageLedger
+from models.archive import export_conversations, import_conversations
+from models.semantic_cache import SemanticCache
 from ui.chat_tab import ChatTab
 from ui.auth_dialogs import LoginDialog
 from ui.bot_selector import BotSelector
+from ui.search_dialog import SearchDialog
+from ui.workers import ResponseWorker, TaskWorker
+from ui.profiler import Profiler
+from ui.theme import icon, bot_icon
 
 
 class ChatBotUI(QMainWindow):
     """Main application window"""
 
+    # Reply to a message sent from the outbox: conversation id, message, reply, error
+    outbox_reply = pyqtSignal(int, str, str, str)
+
     def __init__(self):
         super().__init__()
 
         # Initialize database
         self.db = UserDatabase("chatbot.db")
+        self.store = ConversationStore("chatbot.db")
+        self.search_dialog = None
+        self.archive_worker = None
+        self.outbox = Outbox("chatbot.db")
+
+        # Answers to repeated first questions, shared by all tabs. Only the same
+        # question written differently matches; CHATBOT_SEMANTIC_CACHE=0 turns it off
+        self.semantic_cache = None
+        if os.environ.get("CHATBOT_SEMANTIC_CACHE") != "0":
+            self.semantic_cache = SemanticCache("semantic_cache")
+
+        # Confidence above which the router answers small talk locally in
+        # advanced mode; CHATBOT_ROUTER_THRESHOLD=1.1 sends everything to the API
+        self.router_threshold = float(os.environ.get("CHATBOT_ROUTER_THRESHOLD", "0.7"))
+
+        # Token usage per user, written to the database in batches
+        self.usage_ledger = UsageLedger("chatbot.db")
+        self.usage_ledger.start()
+
+        # Sampling profiler, started from the menu or with /profile in any tab
+        self.profiler = Profiler()
 
         # User info
         self.username = ""
         self.api_key = ""
         self.use_advanced = False
         self.current_bot_type = "simple"
+        # Background connection warm-up and API key check: (state, message)
+        self.key_status = None
+        self.warmup_worker = None
 
         # Login first
         self.check_login()
 
+        # Tabs and drafts are journaled so they survive a crash
+        journal_path = "session-" + re.sub(r"\W", "_", self.username) + ".journal"
+        recovered_tabs = SessionJournal.recover(journal_path)
+        self.journal = SessionJournal(journal_path, recovered_tabs)
+        self.next_journal_id = 1
+
         # Initialize UI
-        self.init_ui()
+        self.init_ui(recovered_tabs)
+
+        # Send messages queued while the API was unreachable
+        self.outbox_reply.connect(self.on_outbox_reply)
+        endpoint = urlparse(resolve_base_url())
+        self.outbox_drainer = OutboxDrainer(
+            self.outbox,
+            send=self.send_outbox_entry,
+            on_reply=self.emit_outbox_reply,
+            host=endpoint.hostname,
+            port=endpoint.port or (80 if endpoint.scheme == "http" else 443),
+            username=self.username,
+            is_connection_error=is_connection_error
+        )
+        self.outbox_drainer.start()
 
     def check_login(self):
         """Check if user is logged in"""
@@ -41,6 +101,8 @@ class ChatBotUI(QMainWindow):
         if login_dialog.exec_():
             self.username = login_dialog.username
             self.api_key = login_dialog.api_key
+            # Connect and check the key while the main window is built
+            self.start_warmup()
             self.check_requirements()
         else:
             # User canceled login
@@ -49,7 +111,8 @@ class ChatBotUI(QMainWindow):
     def check_requirements(self):
         """Check advanced mode requirements"""
         gpu_available = torch.cuda.is_available()
-        api_valid = bool(self.api_key)
+        # A key counts as valid until the warm-up shows the API rejects it
+        api_valid = bool(self.api_key) and not (self.key_status and self.key_status[0] == "invalid")
 
         self.use_advanced = gpu_available and api_valid
 
@@ -62,13 +125,33 @@ class ChatBotUI(QMainWindow):
 
             self.needs_api_setup = not api_valid
 
-    def init_ui(self):
+    def init_ui(self, recovered_tabs=None):
         """Initialize the main UI"""
         self.setWindowTitle(f"AI聊天助手 - {self.username}")
         self.setGeometry(100, 100, 900, 600)
 
         # Set application icon
-        self.setWindowIcon(QIcon("icons/chat_icon.png"))
+        self.setWindowIcon(icon("chat_icon"))
+
+        # Menu bar
+        file_menu = self.menuBar().addMenu("文件")
+
+        export_action = QAction("导出对话...", self)
+        export_action.triggered.connect(self.export_conversations)
+        file_menu.addAction(export_action)
+
+        import_action = QAction("导入对话...", self)
+        import_action.triggered.connect(self.import_conversations)
+        file_menu.addAction(import_action)
+
+        tools_menu = self.menuBar().addMenu("工具")
+        self.profile_action = QAction("性能分析", self)
+        self.profile_action.setCheckable(True)
+        self.profile_action.triggered.connect(self.toggle_profiler)
+        tools_menu.addAction(self.profile_action)
+        # /profile in a tab may have changed the state
+        tools_menu.aboutToShow.connect(
+            lambda: self.profile_action.setChecked(self.profiler.running))
 
         # Central widget
         central_widget = QWidget()
@@ -88,6 +171,8 @@ class ChatBotUI(QMainWindow):
         self.bot_selector = BotSelector(self, self.use_advanced)
         self.bot_selector.bot_changed.connect(self.on_bot_type_changed)
         self.bot_selector.collapse_requested.connect(self.toggle_sidebar)
+        if self.key_status:
+            self.bot_selector.set_key_status(*self.key_status)
         self.splitter.addWidget(self.bot_selector)
 
         # Right content area
@@ -107,20 +192,16 @@ class ChatBotUI(QMainWindow):
         # New chat button
         new_chat_btn = QPushButton("新对话")
         new_chat_btn.clicked.connect(self.create_new_chat)
-        new_chat_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                border-radius: 5px;
-                padding: 8px;
-                min-width: 100px;
-            }
-            QPushButton:hover {
-                background-color: #0b7dda;
-            }
-        """)
+        new_chat_btn.setObjectName("newChatButton")
         button_layout.addWidget(new_chat_btn)
 
+        # Search across saved conversations
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索历史对话...")
+        self.search_edit.setMaximumWidth(200)
+        self.search_edit.returnPressed.connect(self.search_conversations)
+        button_layout.addWidget(self.search_edit)
+
         button_layout.addStretch()
 
         # User info
@@ -130,17 +211,7 @@ class ChatBotUI(QMainWindow):
         # Logout button
         logout_btn = QPushButton("注销")
         logout_btn.clicked.connect(self.logout)
-        logout_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #607d8b;
-                color: white;
-                border-radius: 5px;
-                padding: 8px;
-            }
-            QPushButton:hover {
-                background-color: #455a64;
-            }
-        """)
+        logout_btn.setObjectName("logoutButton")
         button_layout.addWidget(logout_btn)
 
         right_layout.addLayout(button_layout)
@@ -149,9 +220,12 @@ class ChatBotUI(QMainWindow):
         self.splitter.addWidget(right_widget)
         self.splitter.setSizes([self.sidebar_width, 700])  # Set initial sizes
 
-        # Create initial chat
+        # Create initial chat, or reopen the tabs of a crashed session
         self.current_bot_type = "simple" if not self.use_advanced else "advanced"
-        self.create_new_chat()
+        if recovered_tabs:
+            self.restore_session(recovered_tabs)
+        else:
+            self.create_new_chat()
 
         # Prompt for API setup if needed
         if hasattr(self, 'needs_api_setup') and self.needs_api_setup:
@@ -171,8 +245,7 @@ class ChatBotUI(QMainWindow):
             use_advanced = self.current_bot_type == "advanced" and self.use_advanced
 
             # Update tab icon
-            icon = QIcon("icons/advanced_bot.png" if use_advanced else "icons/simple_bot.png")
-            self.tab_widget.setTabIcon(current_index, icon)
+            self.tab_widget.setTabIcon(current_index, bot_icon(use_advanced))
 
             # Update the chat tab's bot
             current_tab.update_api_key(self.api_key, use_advanced)
@@ -188,23 +261,162 @@ class ChatBotUI(QMainWindow):
         # Use the currently selected bot type
         use_advanced = self.current_bot_type == "advanced" and self.use_advanced
 
+        self.add_chat_tab(f"对话 {count + 1}", use_advanced)
+
+    def add_chat_tab(self, title, use_advanced, conversation_id=None, journal_id=None):
+        """Create a chat tab sharing the app's stores and make it the current tab"""
+        if journal_id is None:
+            journal_id = self.next_journal_id
+        self.next_journal_id = max(self.next_journal_id, journal_id + 1)
+
         chat_tab = ChatTab(
             parent=self,
             api_key=self.api_key,
-            title=f"对话 {count + 1}",
-            use_advanced=use_advanced
+            title=title,
+            use_advanced=use_advanced,
+            store=self.store,
+            username=self.username,
+            conversation_id=conversation_id,
+            outbox=self.outbox,
+            router_threshold=self.router_threshold,
+            semantic_cache=self.semantic_cache,
+            profiler=self.profiler,
+            journal=self.journal,
+            journal_id=journal_id,
+            usage_ledger=self.usage_ledger
         )
+        chat_tab.message_queued.connect(self.on_message_queued)
 
         # Set tab icon based on bot type
-        icon = QIcon("icons/advanced_bot.png" if use_advanced else "icons/simple_bot.png")
+        index = self.tab_widget.addTab(chat_tab, bot_icon(use_advanced), title)
+        self.tab_widget.setCurrentIndex(index)
+        return chat_tab
+
+    def restore_session(self, tabs):
+        """Reopen the tabs of a session that crashed, nothing is sent again"""
+        for state in tabs.values():
+            conversation_id = state["conversation_id"]
+            if conversation_id and not self.store.get_conversation(conversation_id):
+                conversation_id = None
+            use_advanced = state["advanced"] and self.use_advanced
+            chat_tab = self.add_chat_tab(state["title"], use_advanced, conversation_id, state["tab"])
+            chat_tab.restore_unsaved(state["messages"], state["draft"])
+
+        self.tab_widget.setCurrentIndex(0)
+        self.tab_widget.widget(0).add_system_message(
+            f"上次程序意外退出，已恢复 {len(tabs)} 个标签页")
+
+    def search_conversations(self):
+        """Open the search dialog for the text in the search box"""
+        if not self.search_dialog:
+            self.search_dialog = SearchDialog(self.store, self.username, self)
+            self.search_dialog.result_selected.connect(self.open_conversation)
+
+        self.search_dialog.set_query(self.search_edit.text())
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+
+    def open_conversation(self, conversation_id, message_id):
+        """Show a saved conversation and jump to one of its messages"""
+        # Switch to the tab if the conversation is already open
+        for i in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(i)
+            if tab.conversation_id == conversation_id:
+                self.tab_widget.setCurrentIndex(i)
+                tab.scroll_to_message(message_id)
+                return
+
+        conversation = self.store.get_conversation(conversation_id)
+        if not conversation:
+            return
 
-        self.tab_widget.addTab(chat_tab, icon, f"对话 {count + 1}")
-        self.tab_widget.setCurrentIndex(count)
+        use_advanced = self.current_bot_type == "advanced" and self.use_advanced
+        chat_tab = self.add_chat_tab(conversation["title"], use_advanced, conversation_id)
+        chat_tab.scroll_to_message(message_id)
+
+    def export_conversations(self):
+        """Export all conversations of the user to a JSONL archive"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出对话", "conversations.jsonl.gz",
+            "JSONL 归档 (*.jsonl.gz *.jsonl.zst *.jsonl)"
+        )
+        if path:
+            self.run_archive_task(export_conversations, self.store, self.username, path)
+
+    def import_conversations(self):
+        """Import conversations from a JSONL archive"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "导入对话", "",
+            "JSONL 归档 (*.jsonl.gz *.jsonl.zst *.jsonl)"
+        )
+        if path:
+            self.run_archive_task(import_conversations, self.store, self.username, path)
+
+    def run_archive_task(self, function, *args):
+        """Run an export or import in the background, one at a time"""
+        if self.archive_worker and self.archive_worker.isRunning():
+            QMessageBox.information(self, "提示", "已有导出或导入任务正在进行")
+            return
+
+        self.archive_worker = TaskWorker(function, *args, parent=self)
+        self.archive_worker.succeeded.connect(
+            lambda counts: QMessageBox.information(
+                self, "完成", f"共 {counts['conversations']} 个对话，{counts['messages']} 条消息"))
+        self.archive_worker.failed.connect(
+            lambda error: QMessageBox.warning(self, "错误", f"导出或导入失败: {error}"))
+        self.archive_worker.start()
+
+    def on_message_queued(self, conversation_id):
+        """A tab put a message in the outbox"""
+        self.outbox_drainer.wake()
+
+    def send_outbox_entry(self, entry):
+        """Send a queued message, called from the outbox drainer threads"""
+        conversation_id = entry["conversation_id"]
+        bot = self.replay_bot(conversation_id)
+        reply = bot.get_response(entry["content"])
+        if bot.last_error:
+            raise bot.last_error
+
+        self.store.add_message(conversation_id, "user", entry["content"])
+        self.store.add_message(conversation_id, "assistant", reply)
+        return reply
+
+    def replay_bot(self, conversation_id):
+        """A bot with the saved context of a conversation, for one queued message
+
+        The tab's own bot is never used from the drainer threads, where a
+        command or the Stop button of the tab could change it mid-request.
+        Each replayed exchange is saved before the next message of the
+        conversation is sent, so the saved context is always complete.
+        """
+        bot = DS_Bot(api_key=self.api_key, usage_ledger=self.usage_ledger, username=self.username)
+        for message in self.store.get_messages(conversation_id):
+            bot.add_message(message["role"], message["content"])
+        return bot
+
+    def emit_outbox_reply(self, entry, reply, error):
+        """Hand an outbox reply over to the GUI thread"""
+        self.outbox_reply.emit(entry["conversation_id"], entry["content"],
+                               reply or "", str(error) if error else "")
+
+    def on_outbox_reply(self, conversation_id, message, reply, error):
+        """Show an outbox reply in the tab of its conversation"""
+        for i in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(i)
+            if tab.conversation_id == conversation_id:
+                tab.show_outbox_reply(message, reply, error)
+                return
 
     def close_tab(self, index):
         """Close a chat tab"""
         if self.tab_widget.count() > 1:
+            tab = self.tab_widget.widget(index)
+            # Abort the running request so it stops billing tokens
+            tab.shutdown()
+            self.journal.close_tab(tab.journal_id)
             self.tab_widget.removeTab(index)
+            tab.deleteLater()
         else:
             QMessageBox.information(self, "提示", "至少需要保留一个对话")
 
@@ -223,19 +435,63 @@ class ChatBotUI(QMainWindow):
             # Update API key in database
             self.db.update_api_key(self.username, self.api_key)
 
-            # Recheck requirements
-            self.check_requirements()
-
-            # Update bot selector
-            self.bot_selector.update_status(self.use_advanced)
-
-            # Update all tabs
-            for i in range(self.tab_widget.count()):
-                tab = self.tab_widget.widget(i)
-                tab.update_api_key(self.api_key, self.use_advanced)
+            # Check the new key in the background
+            self.start_warmup()
+            self.apply_requirements()
 
             QMessageBox.information(self, "成功", "API设置已更新")
 
+    def apply_requirements(self):
+        """Recheck advanced mode and update the bot selector and all tabs"""
+        self.check_requirements()
+
+        # Update bot selector
+        self.bot_selector.update_status(self.use_advanced)
+
+        # Update all tabs
+        for i in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(i)
+            tab.update_api_key(self.api_key, self.use_advanced)
+
+    def start_warmup(self):
+        """Connect to the API and validate the key off the GUI thread
+
+        The connection stays in the client pool shared by all tabs, so the
+        first message does not wait for DNS, TLS and client setup.
+        """
+        if not self.api_key:
+            self.key_status = None
+            return
+
+        api_key = self.api_key
+        self.warmup_worker = TaskWorker(warm_up, api_key, parent=self)
+        self.warmup_worker.succeeded.connect(
+            lambda result: self.on_warmup_finished(api_key, *result))
+        self.warmup_worker.failed.connect(
+            lambda error: self.on_warmup_finished(api_key, "unreachable", error))
+        self.set_key_status("checking", "正在连接API并验证密钥")
+        self.warmup_worker.start()
+
+    def on_warmup_finished(self, api_key, state, message):
+        if api_key != self.api_key:
+            # The key was changed while it was checked
+            return
+
+        was_invalid = self.key_status and self.key_status[0] == "invalid"
+        self.set_key_status(state, message)
+        # Only a rejected key changes the mode, an unreachable API is handled by the outbox
+        if (state == "invalid") != bool(was_invalid):
+            if hasattr(self, "tab_widget"):
+                self.apply_requirements()
+            else:
+                self.check_requirements()
+
+    def set_key_status(self, state, message):
+        self.key_status = (state, message)
+        # The bot selector does not exist until init_ui()
+        if hasattr(self, "bot_selector"):
+            self.bot_selector.set_key_status(state, message)
+
     def prompt_api_settings(self):
         """Prompt user to set API key"""
         response = QMessageBox.question(
@@ -258,6 +514,8 @@ class ChatBotUI(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
+            self.journal.close()
+            self.usage_ledger.close()
             # Restart application logic
             QApplication.quit()
             program = sys.executable
@@ -273,4 +531,38 @@ class ChatBotUI(QMainWindow):
         else:
             # Expand sidebar (restore previous width)
             current_sizes = self.splitter.sizes()
-            self.splitter.setSizes([self.sidebar_width, current_sizes[1] - (self.sidebar_width - 40)])
\ No newline at end of file
+            self.splitter.setSizes([self.sidebar_width, current_sizes[1] - (self.sidebar_width - 40)])
+
+    def toggle_profiler(self, checked):
+        """Start profiling, or stop it and show where the profile was saved"""
+        if checked:
+            self.profiler.start()
+            return
+
+        result = self.profiler.stop()
+        if result:
+            QMessageBox.information(self, "性能分析", Profiler.describe(*result))
+
+    def closeEvent(self, event):
+        """Stop background work before the window closes"""
+        # Cancel running replies, their threads must finish before the
+        # tabs and workers are destroyed
+        for i in range(self.tab_widget.count()):
+            self.tab_widget.widget(i).shutdown()
+        ResponseWorker.wait_detached()
+        if self.search_dialog and self.search_dialog.worker:
+            self.search_dialog.worker.wait()
+        if self.archive_worker:
+            # An export or import cannot be interrupted halfway
+            self.archive_worker.wait()
+        self.outbox_drainer.stop()
+        if self.profiler.running:
+            self.profiler.stop()
+        if self.semantic_cache:
+            self.semantic_cache.save()
+        self.journal.close()
+        self.usage_ledger.close()
+        if self.warmup_worker:
+            # Bounded by the warm-up request timeout
+            self.warmup_worker.wait()
+        super().closeEvent(event)
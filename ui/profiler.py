@@ -0,0 +1,158 @@
+import json
+import os
+import sys
+import threading
+import time
+
+
+class _Sampler(threading.Thread):
+    """Samples the Python stacks of all other threads every interval seconds"""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True, name="ProfileSampler")
+        self.interval = interval
+        self.stacks = {}  # (thread name, code objects root first) -> sample count
+        self.samples = 0
+        self.sampling_time = 0.0
+        self.started = time.monotonic()
+        self.stopped = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.stopped = time.monotonic()
+
+    def run(self):
+        own_id = threading.get_ident()
+        thread_names = {}
+        while not self._stop_event.wait(self.interval):
+            begin = time.perf_counter()
+            frames = sys._current_frames()
+            if any(ident not in thread_names for ident in frames):
+                # QThreads are not registered with threading, name them by id
+                thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident in frames:
+                    thread_names.setdefault(ident, f"Thread-{ident}")
+
+            for ident, frame in frames.items():
+                if ident == own_id:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.reverse()
+                key = (thread_names[ident], tuple(codes))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+            self.sampling_time += time.perf_counter() - begin
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def write_collapsed(stacks, path):
+    """One "thread;outer;...;inner count" line per stack, for flamegraph.pl or speedscope"""
+    with open(path, "w", encoding="utf-8") as output:
+        for (thread_name, codes), count in sorted(stacks.items(), key=lambda item: -item[1]):
+            frames = [thread_name] + [frame_label(code) for code in codes]
+            output.write(";".join(frame.replace(";", ":") for frame in frames) + f" {count}\n")
+
+
+def write_speedscope(stacks, path, interval):
+    """Speedscope sampled profile, one profile per thread (https://www.speedscope.app)"""
+    frame_index = {}
+    frames = []
+    threads = {}
+    for (thread_name, codes), count in stacks.items():
+        stack = []
+        for code in codes:
+            if code not in frame_index:
+                frame_index[code] = len(frames)
+                frames.append({"name": code.co_name, "file": code.co_filename,
+                               "line": code.co_firstlineno})
+            stack.append(frame_index[code])
+        samples, weights = threads.setdefault(thread_name, ([], []))
+        samples.append(stack)
+        weights.append(count * interval * 1000)
+
+    profiles = []
+    for thread_name, (samples, weights) in threads.items():
+        profiles.append({
+            "type": "sampled", "name": thread_name, "unit": "milliseconds",
+            "startValue": 0, "endValue": sum(weights),
+            "samples": samples, "weights": weights,
+        })
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+            "name": os.path.basename(path),
+            "exporter": "chatbot profiler",
+        }, output)
+
+
+class Profiler:
+    """On-demand sampling profiler for all threads of the app
+
+    Sampling runs in its own thread and only reads sys._current_frames(),
+    nothing is traced, so the app runs at normal speed while profiling.
+    stop() writes the samples as collapsed stacks (.txt) and as speedscope
+    JSON (.speedscope.json) to output_dir.
+    """
+
+    def __init__(self, interval=0.005, output_dir="profiles"):
+        self.interval = interval
+        self.output_dir = output_dir
+        self._sampler = None
+
+    @property
+    def running(self):
+        return self._sampler is not None
+
+    def start(self):
+        if self._sampler is None:
+            self._sampler = _Sampler(self.interval)
+            self._sampler.start()
+
+    def stop(self):
+        """Stop sampling and write the profile, returns (collapsed path, speedscope path, sampler)"""
+        sampler = self._sampler
+        if sampler is None:
+            return None
+        self._sampler = None
+        sampler.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, time.strftime("profile-%Y%m%d-%H%M%S"))
+        write_collapsed(sampler.stacks, base + ".txt")
+        write_speedscope(sampler.stacks, base + ".speedscope.json", self.interval)
+        return base + ".txt", base + ".speedscope.json", sampler
+
+    def handle_command(self, command):
+        """/profile start|stop, returns the reply shown in the chat"""
+        action = command.lower().split()[1:2]
+        if action == ["start"]:
+            if self.running:
+                return "性能分析已在进行中。输入 /profile stop 结束并保存。"
+            self.start()
+            return "性能分析已开始，重现缓慢的操作后输入 /profile stop 保存结果。"
+        if action == ["stop"]:
+            result = self.stop()
+            if result is None:
+                return "性能分析未在进行。输入 /profile start 开始。"
+            return self.describe(*result)
+        state = "进行中" if self.running else "未开始"
+        return f"用法: /profile start|stop（当前{state}）"
+
+    @staticmethod
+    def describe(collapsed_path, speedscope_path, sampler):
+        duration = sampler.stopped - sampler.started
+        overhead = sampler.sampling_time / duration if duration else 0.0
+        return (f"性能分析已保存（{duration:.1f} 秒，{sampler.samples} 次采样，"
+                f"采样耗时占 {overhead:.1%}）:\n"
+                f"{os.path.abspath(collapsed_path)}\n"
+                f"{os.path.abspath(speedscope_path)}")
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+
+# Resource object code
+#
+# Created by: The Resource Compiler for PyQt5 (Qt v5.15.14)
+#
+# WARNING! All changes made in this file will be lost!
+
+from PyQt5 import QtCore
+
+qt_resource_data = b"\
+\x00\x00\x05\x85\
+\x2f\
+\x2a\x20\x41\x70\x70\x6c\x69\x63\x61\x74\x69\x6f\x6e\x20\x73\x74\
+\x79\x6c\x65\x73\x68\x65\x65\x74\x2c\x20\x61\x70\x70\x6c\x69\x65\
+\x64\x20\x6f\x6e\x63\x65\x20\x74\x6f\x20\x74\x68\x65\x20\x51\x41\
+\x70\x70\x6c\x69\x63\x61\x74\x69\x6f\x6e\x20\x28\x75\x69\x2f\x74\
+\x68\x65\x6d\x65\x2e\x70\x79\x29\x20\x2a\x2f\x0a\x0a\x51\x50\x75\
+\x73\x68\x42\x75\x74\x74\x6f\x6e\x23\x6e\x65\x77\x43\x68\x61\x74\
+\x42\x75\x74\x74\x6f\x6e\x20\x7b\x0a\x20\x20\x20\x20\x62\x61\x63\
+\x6b\x67\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\x6f\x72\x3a\x20\x23\
+\x32\x31\x39\x36\x46\x33\x3b\x0a\x20\x20\x20\x20\x63\x6f\x6c\x6f\
+\x72\x3a\x20\x77\x68\x69\x74\x65\x3b\x0a\x20\x20\x20\x20\x62\x6f\
+\x72\x64\x65\x72\x2d\x72\x61\x64\x69\x75\x73\x3a\x20\x35\x70\x78\
+\x3b\x0a\x20\x20\x20\x20\x70\x61\x64\x64\x69\x6e\x67\x3a\x20\x38\
+\x70\x78\x3b\x0a\x20\x20\x20\x20\x6d\x69\x6e\x2d\x77\x69\x64\x74\
+\x68\x3a\x20\x31\x30\x30\x70\x78\x3b\x0a\x7d\x0a\x51\x50\x75\x73\
+\x68\x42\x75\x74\x74\x6f\x6e\x23\x6e\x65\x77\x43\x68\x61\x74\x42\
+\x75\x74\x74\x6f\x6e\x3a\x68\x6f\x76\x65\x72\x20\x7b\x0a\x20\x20\
+\x20\x20\x62\x61\x63\x6b\x67\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\
+\x6f\x72\x3a\x20\x23\x30\x62\x37\x64\x64\x61\x3b\x0a\x7d\x0a\x0a\
+\x51\x50\x75\x73\x68\x42\x75\x74\x74\x6f\x6e\x23\x6c\x6f\x67\x6f\
+\x75\x74\x42\x75\x74\x74\x6f\x6e\x20\x7b\x0a\x20\x20\x20\x20\x62\
+\x61\x63\x6b\x67\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\x6f\x72\x3a\
+\x20\x23\x36\x30\x37\x64\x38\x62\x3b\x0a\x20\x20\x20\x20\x63\x6f\
+\x6c\x6f\x72\x3a\x20\x77\x68\x69\x74\x65\x3b\x0a\x20\x20\x20\x20\
+\x62\x6f\x72\x64\x65\x72\x2d\x72\x61\x64\x69\x75\x73\x3a\x20\x35\
+\x70\x78\x3b\x0a\x20\x20\x20\x20\x70\x61\x64\x64\x69\x6e\x67\x3a\
+\x20\x38\x70\x78\x3b\x0a\x7d\x0a\x51\x50\x75\x73\x68\x42\x75\x74\
+\x74\x6f\x6e\x23\x6c\x6f\x67\x6f\x75\x74\x42\x75\x74\x74\x6f\x6e\
+\x3a\x68\x6f\x76\x65\x72\x20\x7b\x0a\x20\x20\x20\x20\x62\x61\x63\
+\x6b\x67\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\x6f\x72\x3a\x20\x23\
+\x34\x35\x35\x61\x36\x34\x3b\x0a\x7d\x0a\x0a\x51\x50\x75\x73\x68\
+\x42\x75\x74\x74\x6f\x6e\x23\x73\x65\x6e\x64\x42\x75\x74\x74\x6f\
+\x6e\x20\x7b\x0a\x20\x20\x20\x20\x62\x61\x63\x6b\x67\x72\x6f\x75\
+\x6e\x64\x2d\x63\x6f\x6c\x6f\x72\x3a\x20\x23\x34\x43\x41\x46\x35\
+\x30\x3b\x0a\x20\x20\x20\x20\x63\x6f\x6c\x6f\x72\x3a\x20\x77\x68\
+\x69\x74\x65\x3b\x0a\x20\x20\x20\x20\x62\x6f\x72\x64\x65\x72\x2d\
+\x72\x61\x64\x69\x75\x73\x3a\x20\x35\x70\x78\x3b\x0a\x20\x20\x20\
+\x20\x70\x61\x64\x64\x69\x6e\x67\x3a\x20\x35\x70\x78\x3b\x0a\x7d\
+\x0a\x51\x50\x75\x73\x68\x42\x75\x74\x74\x6f\x6e\x23\x73\x65\x6e\
+\x64\x42\x75\x74\x74\x6f\x6e\x3a\x68\x6f\x76\x65\x72\x20\x7b\x0a\
+\x20\x20\x20\x20\x62\x61\x63\x6b\x67\x72\x6f\x75\x6e\x64\x2d\x63\
+\x6f\x6c\x6f\x72\x3a\x20\x23\x34\x35\x61\x30\x34\x39\x3b\x0a\x7d\
+\x0a\x0a\x51\x50\x75\x73\x68\x42\x75\x74\x74\x6f\x6e\x23\x73\x74\
+\x6f\x70\x42\x75\x74\x74\x6f\x6e\x20\x7b\x0a\x20\x20\x20\x20\x62\
+\x61\x63\x6b\x67\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\x6f\x72\x3a\
+\x20\x23\x66\x34\x34\x33\x33\x36\x3b\x0a\x20\x20\x20\x20\x63\x6f\
+\x6c\x6f\x72\x3a\x20\x77\x68\x69\x74\x65\x3b\x0a\x20\x20\x20\x20\
+\x62\x6f\x72\x64\x65\x72\x2d\x72\x61\x64\x69\x75\x73\x3a\x20\x35\
+\x70\x78\x3b\x0a\x20\x20\x20\x20\x70\x61\x64\x64\x69\x6e\x67\x3a\
+\x20\x35\x70\x78\x3b\x0a\x7d\x0a\x51\x50\x75\x73\x68\x42\x75\x74\
+\x74\x6f\x6e\x23\x73\x74\x6f\x70\x42\x75\x74\x74\x6f\x6e\x3a\x68\
+\x6f\x76\x65\x72\x20\x7b\x0a\x20\x20\x20\x20\x62\x61\x63\x6b\x67\
+\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\x6f\x72\x3a\x20\x23\x64\x61\
+\x31\x39\x30\x62\x3b\x0a\x7d\x0a\x0a\x51\x4c\x61\x62\x65\x6c\x23\
+\x61\x64\x76\x61\x6e\x63\x65\x64\x53\x74\x61\x74\x75\x73\x20\x7b\
+\x0a\x20\x20\x20\x20\x63\x6f\x6c\x6f\x72\x3a\x20\x67\x72\x65\x65\
+\x6e\x3b\x0a\x20\x20\x20\x20\x66\x6f\x6e\x74\x2d\x77\x65\x69\x67\
+\x68\x74\x3a\x20\x62\x6f\x6c\x64\x3b\x0a\x7d\x0a\x51\x4c\x61\x62\
+\x65\x6c\x23\x73\x69\x6d\x70\x6c\x65\x53\x74\x61\x74\x75\x73\x20\
+\x7b\x0a\x20\x20\x20\x20\x63\x6f\x6c\x6f\x72\x3a\x20\x6f\x72\x61\
+\x6e\x67\x65\x3b\x0a\x20\x20\x20\x20\x66\x6f\x6e\x74\x2d\x77\x65\
+\x69\x67\x68\x74\x3a\x20\x62\x6f\x6c\x64\x3b\x0a\x7d\x0a\x0a\x51\
+\x54\x65\x78\x74\x45\x64\x69\x74\x23\x63\x68\x61\x74\x48\x69\x73\
+\x74\x6f\x72\x79\x20\x7b\x0a\x20\x20\x20\x20\x62\x61\x63\x6b\x67\
+\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\x6f\x72\x3a\x20\x23\x66\x35\
+\x66\x35\x66\x35\x3b\x0a\x20\x20\x20\x20\x62\x6f\x72\x64\x65\x72\
+\x2d\x72\x61\x64\x69\x75\x73\x3a\x20\x35\x70\x78\x3b\x0a\x7d\x0a\
+\x51\x54\x65\x78\x74\x45\x64\x69\x74\x23\x6d\x65\x73\x73\x61\x67\
+\x65\x49\x6e\x70\x75\x74\x20\x7b\x0a\x20\x20\x20\x20\x62\x6f\x72\
+\x64\x65\x72\x2d\x72\x61\x64\x69\x75\x73\x3a\x20\x35\x70\x78\x3b\
+\x0a\x7d\x0a\x0a\x51\x4c\x61\x62\x65\x6c\x23\x73\x65\x6c\x65\x63\
+\x74\x6f\x72\x54\x69\x74\x6c\x65\x20\x7b\x0a\x20\x20\x20\x20\x66\
+\x6f\x6e\x74\x2d\x77\x65\x69\x67\x68\x74\x3a\x20\x62\x6f\x6c\x64\
+\x3b\x0a\x20\x20\x20\x20\x66\x6f\x6e\x74\x2d\x73\x69\x7a\x65\x3a\
+\x20\x31\x34\x70\x78\x3b\x0a\x7d\x0a\x0a\x51\x4c\x61\x62\x65\x6c\
+\x23\x6b\x65\x79\x53\x74\x61\x74\x75\x73\x20\x7b\x0a\x20\x20\x20\
+\x20\x63\x6f\x6c\x6f\x72\x3a\x20\x67\x72\x61\x79\x3b\x0a\x7d\x0a\
+\x51\x4c\x61\x62\x65\x6c\x23\x6b\x65\x79\x53\x74\x61\x74\x75\x73\
+\x5b\x73\x74\x61\x74\x65\x3d\x22\x76\x61\x6c\x69\x64\x22\x5d\x20\
+\x7b\x0a\x20\x20\x20\x20\x63\x6f\x6c\x6f\x72\x3a\x20\x67\x72\x65\
+\x65\x6e\x3b\x0a\x7d\x0a\x51\x4c\x61\x62\x65\x6c\x23\x6b\x65\x79\
+\x53\x74\x61\x74\x75\x73\x5b\x73\x74\x61\x74\x65\x3d\x22\x69\x6e\
+\x76\x61\x6c\x69\x64\x22\x5d\x20\x7b\x0a\x20\x20\x20\x20\x63\x6f\
+\x6c\x6f\x72\x3a\x20\x23\x66\x34\x34\x33\x33\x36\x3b\x0a\x20\x20\
+\x20\x20\x66\x6f\x6e\x74\x2d\x77\x65\x69\x67\x68\x74\x3a\x20\x62\
+\x6f\x6c\x64\x3b\x0a\x7d\x0a\x51\x4c\x61\x62\x65\x6c\x23\x6b\x65\
+\x79\x53\x74\x61\x74\x75\x73\x5b\x73\x74\x61\x74\x65\x3d\x22\x75\
+\x6e\x72\x65\x61\x63\x68\x61\x62\x6c\x65\x22\x5d\x20\x7b\x0a\x20\
+\x20\x20\x20\x63\x6f\x6c\x6f\x72\x3a\x20\x6f\x72\x61\x6e\x67\x65\
+\x3b\x0a\x7d\x0a\
+\x00\x00\x00\xd3\
+\x3c\
+\x73\x76\x67\x20\x78\x6d\x6c\x6e\x73\x3d\x22\x68\x74\x74\x70\x3a\
+\x2f\x2f\x77\x77\x77\x2e\x77\x33\x2e\x6f\x72\x67\x2f\x32\x30\x30\
+\x30\x2f\x73\x76\x67\x22\x20\x77\x69\x64\x74\x68\x3d\x22\x31\x36\
+\x22\x20\x68\x65\x69\x67\x68\x74\x3d\x22\x31\x36\x22\x20\x76\x69\
+\x65\x77\x42\x6f\x78\x3d\x22\x30\x20\x30\x20\x31\x36\x20\x31\x36\
+\x22\x3e\x0a\x20\x20\x3c\x70\x61\x74\x68\x20\x64\x3d\x22\x4d\x36\
+\x20\x33\x6c\x35\x20\x35\x2d\x35\x20\x35\x22\x20\x66\x69\x6c\x6c\
+\x3d\x22\x6e\x6f\x6e\x65\x22\x20\x73\x74\x72\x6f\x6b\x65\x3d\x22\
+\x23\x34\x35\x35\x61\x36\x34\x22\x20\x73\x74\x72\x6f\x6b\x65\x2d\
+\x77\x69\x64\x74\x68\x3d\x22\x32\x22\x20\x73\x74\x72\x6f\x6b\x65\
+\x2d\x6c\x69\x6e\x65\x63\x61\x70\x3d\x22\x72\x6f\x75\x6e\x64\x22\
+\x20\x73\x74\x72\x6f\x6b\x65\x2d\x6c\x69\x6e\x65\x6a\x6f\x69\x6e\
+\x3d\x22\x72\x6f\x75\x6e\x64\x22\x2f\x3e\x0a\x3c\x2f\x73\x76\x67\
+\x3e\x0a\
+\x00\x00\x01\xb7\
+\x3c\
+\x73\x76\x67\x20\x78\x6d\x6c\x6e\x73\x3d\x22\x68\x74\x74\x70\x3a\
+\x2f\x2f\x77\x77\x77\x2e\x77\x33\x2e\x6f\x72\x67\x2f\x32\x30\x30\
+\x30\x2f\x73\x76\x67\x22\x20\x77\x69\x64\x74\x68\x3d\x22\x33\x32\
+\x22\x20\x68\x65\x69\x67\x68\x74\x3d\x22\x33\x32\x22\x20\x76\x69\
+\x65\x77\x42\x6f\x78\x3d\x22\x30\x20\x30\x20\x33\x32\x20\x33\x32\
+\x22\x3e\x0a\x20\x20\x3c\x72\x65\x63\x74\x20\x78\x3d\x22\x35\x22\
+\x20\x79\x3d\x22\x39\x22\x20\x77\x69\x64\x74\x68\x3d\x22\x32\x32\
+\x22\x20\x68\x65\x69\x67\x68\x74\x3d\x22\x31\x37\x22\x20\x72\x78\
+\x3d\x22\x34\x22\x20\x66\x69\x6c\x6c\x3d\x22\x23\x66\x66\x39\x38\
+\x30\x30\x22\x2f\x3e\x0a\x20\x20\x3c\x72\x65\x63\x74\x20\x78\x3d\
+\x22\x31\x35\x22\x20\x79\x3d\x22\x33\x22\x20\x77\x69\x64\x74\x68\
+\x3d\x22\x32\x22\x20\x68\x65\x69\x67\x68\x74\x3d\x22\x36\x22\x20\
+\x66\x69\x6c\x6c\x3d\x22\x23\x66\x66\x39\x38\x30\x30\x22\x2f\x3e\
+\x0a\x20\x20\x3c\x63\x69\x72\x63\x6c\x65\x20\x63\x78\x3d\x22\x31\
+\x36\x22\x20\x63\x79\x3d\x22\x33\x22\x20\x72\x3d\x22\x32\x22\x20\
+\x66\x69\x6c\x6c\x3d\x22\x23\x66\x66\x39\x38\x30\x30\x22\x2f\x3e\
+\x0a\x20\x20\x3c\x63\x69\x72\x63\x6c\x65\x20\x63\x78\x3d\x22\x31\
+\x31\x2e\x35\x22\x20\x63\x79\x3d\x22\x31\x36\x22\x20\x72\x3d\x22\
+\x32\x2e\x35\x22\x20\x66\x69\x6c\x6c\x3d\x22\x23\x66\x66\x66\x66\
+\x66\x66\x22\x2f\x3e\x0a\x20\x20\x3c\x63\x69\x72\x63\x6c\x65\x20\
+\x63\x78\x3d\x22\x32\x30\x2e\x35\x22\x20\x63\x79\x3d\x22\x31\x36\
+\x22\x20\x72\x3d\x22\x32\x2e\x35\x22\x20\x66\x69\x6c\x6c\x3d\x22\
+\x23\x66\x66\x66\x66\x66\x66\x22\x2f\x3e\x0a\x20\x20\x3c\x72\x65\
+\x63\x74\x20\x78\x3d\x22\x31\x31\x22\x20\x79\x3d\x22\x32\x31\x22\
+\x20\x77\x69\x64\x74\x68\x3d\x22\x31\x30\x22\x20\x68\x65\x69\x67\
+\x68\x74\x3d\x22\x32\x22\x20\x72\x78\x3d\x22\x31\x22\x20\x66\x69\
+\x6c\x6c\x3d\x22\x23\x66\x66\x66\x66\x66\x66\x22\x2f\x3e\x0a\x3c\
+\x2f\x73\x76\x67\x3e\x0a\
+\x00\x00\x02\x0d\
+\x3c\
+\x73\x76\x67\x20\x78\x6d\x6c\x6e\x73\x3d\x22\x68\x74\x74\x70\x3a\
+\x2f\x2f\x77\x77\x77\x2e\x77\x33\x2e\x6f\x72\x67\x2f\x32\x30\x30\
+\x30\x2f\x73\x76\x67\x22\x20\x77\x69\x64\x74\x68\x3d\x22\x33\x32\
+\x22\x20\x68\x65\x69\x67\x68\x74\x3d\x22\x33\x32\x22\x20\x76\x69\
+\x65\x77\x42\x6f\x78\x3d\x22\x30\x20\x30\x20\x33\x32\x20\x33\x32\
+\x22\x3e\x0a\x20\x20\x3c\x72\x65\x63\x74\x20\x78\x3d\x22\x35\x22\
+\x20\x79\x3d\x22\x39\x22\x20\x77\x69\x64\x74\x68\x3d\x22\x32\x32\
+\x22\x20\x68\x65\x69\x67\x68\x74\x3d\x22\x31\x37\x22\x20\x72\x78\
+\x3d\x22\x34\x22\x20\x66\x69\x6c\x6c\x3d\x22\x23\x34\x43\x41\x46\
+\x35\x30\x22\x2f\x3e\x0a\x20\x20\x3c\x72\x65\x63\x74\x20\x78\x3d\
+\x22\x31\x35\x22\x20\x79\x3d\x22\x33\x22\x20\x77\x69\x64\x74\x68\
+\x3d\x22\x32\x22\x20\x68\x65\x69\x67\x68\x74\x3d\x22\x36\x22\x20\
+\x66\x69\x6c\x6c\x3d\x22\x23\x34\x43\x41\x46\x35\x30\x22\x2f\x3e\
+\x0a\x20\x20\x3c\x63\x69\x72\x63\x6c\x65\x20\x63\x78\x3d\x22\x31\
+\x36\x22\x20\x63\x79\x3d\x22\x33\x22\x20\x72\x3d\x22\x32\x22\x20\
+\x66\x69\x6c\x6c\x3d\x22\x23\x34\x43\x41\x46\x35\x30\x22\x2f\x3e\
+\x0a\x20\x20\x3c\x63\x69\x72\x63\x6c\x65\x20\x63\x78\x3d\x22\x31\
+\x31\x2e\x35\x22\x20\x63\x79\x3d\x22\x31\x36\x22\x20\x72\x3d\x22\
+\x32\x2e\x35\x22\x20\x66\x69\x6c\x6c\x3d\x22\x23\x66\x66\x66\x66\
+\x66\x66\x22\x2f\x3e\x0a\x20\x20\x3c\x63\x69\x72\x63\x6c\x65\x20\
+\x63\x78\x3d\x22\x32\x30\x2e\x35\x22\x20\x63\x79\x3d\x22\x31\x36\
+\x22\x20\x72\x3d\x22\x32\x2e\x35\x22\x20\x66\x69\x6c\x6c\x3d\x22\
+\x23\x66\x66\x66\x66\x66\x66\x22\x2f\x3e\x0a\x20\x20\x3c\x72\x65\
+\x63\x74\x20\x78\x3d\x22\x31\x31\x22\x20\x79\x3d\x22\x32\x31\x22\
+\x20\x77\x69\x64\x74\x68\x3d\x22\x31\x30\x22\x20\x68\x65\x69\x67\
+\x68\x74\x3d\x22\x32\x22\x20\x72\x78\x3d\x22\x31\x22\x20\x66\x69\
+\x6c\x6c\x3d\x22\x23\x66\x66\x66\x66\x66\x66\x22\x2f\x3e\x0a\x20\
+\x20\x3c\x70\x61\x74\x68\x20\x64\x3d\x22\x4d\x32\x36\x20\x32\x6c\
+\x31\x2e\x32\x20\x32\x2e\x38\x4c\x33\x30\x20\x36\x6c\x2d\x32\x2e\
+\x38\x20\x31\x2e\x32\x4c\x32\x36\x20\x31\x30\x6c\x2d\x31\x2e\x32\
+\x2d\x32\x2e\x38\x4c\x32\x32\x20\x36\x6c\x32\x2e\x38\x2d\x31\x2e\
+\x32\x7a\x22\x20\x66\x69\x6c\x6c\x3d\x22\x23\x32\x31\x39\x36\x46\
+\x33\x22\x2f\x3e\x0a\x3c\x2f\x73\x76\x67\x3e\x0a\
+\x00\x00\x00\xd4\
+\x3c\
+\x73\x76\x67\x20\x78\x6d\x6c\x6e\x73\x3d\x22\x68\x74\x74\x70\x3a\
+\x2f\x2f\x77\x77\x77\x2e\x77\x33\x2e\x6f\x72\x67\x2f\x32\x30\x30\
+\x30\x2f\x73\x76\x67\x22\x20\x77\x69\x64\x74\x68\x3d\x22\x31\x36\
+\x22\x20\x68\x65\x69\x67\x68\x74\x3d\x22\x31\x36\x22\x20\x76\x69\
+\x65\x77\x42\x6f\x78\x3d\x22\x30\x20\x30\x20\x31\x36\x20\x31\x36\
+\x22\x3e\x0a\x20\x20\x3c\x70\x61\x74\x68\x20\x64\x3d\x22\x4d\x31\
+\x30\x20\x33\x4c\x35\x20\x38\x6c\x35\x20\x35\x22\x20\x66\x69\x6c\
+\x6c\x3d\x22\x6e\x6f\x6e\x65\x22\x20\x73\x74\x72\x6f\x6b\x65\x3d\
+\x22\x23\x34\x35\x35\x61\x36\x34\x22\x20\x73\x74\x72\x6f\x6b\x65\
+\x2d\x77\x69\x64\x74\x68\x3d\x22\x32\x22\x20\x73\x74\x72\x6f\x6b\
+\x65\x2d\x6c\x69\x6e\x65\x63\x61\x70\x3d\x22\x72\x6f\x75\x6e\x64\
+\x22\x20\x73\x74\x72\x6f\x6b\x65\x2d\x6c\x69\x6e\x65\x6a\x6f\x69\
+\x6e\x3d\x22\x72\x6f\x75\x6e\x64\x22\x2f\x3e\x0a\x3c\x2f\x73\x76\
+\x67\x3e\x0a\
+\x00\x00\x01\x64\
+\x3c\
+\x73\x76\x67\x20\x78\x6d\x6c\x6e\x73\x3d\x22\x68\x74\x74\x70\x3a\
+\x2f\x2f\x77\x77\x77\x2e\x77\x33\x2e\x6f\x72\x67\x2f\x32\x30\x30\
+\x30\x2f\x73\x76\x67\x22\x20\x77\x69\x64\x74\x68\x3d\x22\x36\x34\
+\x22\x20\x68\x65\x69\x67\x68\x74\x3d\x22\x36\x34\x22\x20\x76\x69\
+\x65\x77\x42\x6f\x78\x3d\x22\x30\x20\x30\x20\x36\x34\x20\x36\x34\
+\x22\x3e\x0a\x20\x20\x3c\x70\x61\x74\x68\x20\x64\x3d\x22\x4d\x31\
+\x30\x20\x38\x68\x34\x34\x61\x36\x20\x36\x20\x30\x20\x30\x20\x31\
+\x20\x36\x20\x36\x76\x32\x36\x61\x36\x20\x36\x20\x30\x20\x30\x20\
+\x31\x2d\x36\x20\x36\x48\x32\x38\x6c\x2d\x31\x32\x20\x31\x30\x76\
+\x2d\x31\x30\x68\x2d\x36\x61\x36\x20\x36\x20\x30\x20\x30\x20\x31\
+\x2d\x36\x2d\x36\x56\x31\x34\x61\x36\x20\x36\x20\x30\x20\x30\x20\
+\x31\x20\x36\x2d\x36\x7a\x22\x20\x66\x69\x6c\x6c\x3d\x22\x23\x32\
+\x31\x39\x36\x46\x33\x22\x2f\x3e\x0a\x20\x20\x3c\x63\x69\x72\x63\
+\x6c\x65\x20\x63\x78\x3d\x22\x32\x32\x22\x20\x63\x79\x3d\x22\x32\
+\x37\x22\x20\x72\x3d\x22\x34\x22\x20\x66\x69\x6c\x6c\x3d\x22\x23\
+\x66\x66\x66\x66\x66\x66\x22\x2f\x3e\x0a\x20\x20\x3c\x63\x69\x72\
+\x63\x6c\x65\x20\x63\x78\x3d\x22\x33\x32\x22\x20\x63\x79\x3d\x22\
+\x32\x37\x22\x20\x72\x3d\x22\x34\x22\x20\x66\x69\x6c\x6c\x3d\x22\
+\x23\x66\x66\x66\x66\x66\x66\x22\x2f\x3e\x0a\x20\x20\x3c\x63\x69\
+\x72\x63\x6c\x65\x20\x63\x78\x3d\x22\x34\x32\x22\x20\x63\x79\x3d\
+\x22\x32\x37\x22\x20\x72\x3d\x22\x34\x22\x20\x66\x69\x6c\x6c\x3d\
+\x22\x23\x66\x66\x66\x66\x66\x66\x22\x2f\x3e\x0a\x3c\x2f\x73\x76\
+\x67\x3e\x0a\
+"
+
+qt_resource_name = b"\
+\x00\x05\
+\x00\x6f\xa6\x53\
+\x00\x69\
+\x00\x63\x00\x6f\x00\x6e\x00\x73\
+\x00\x06\
+\x07\xac\x02\xc3\
+\x00\x73\
+\x00\x74\x00\x79\x00\x6c\x00\x65\x00\x73\
+\x00\x09\
+\x00\x28\xad\x23\
+\x00\x73\
+\x00\x74\x00\x79\x00\x6c\x00\x65\x00\x2e\x00\x71\x00\x73\x00\x73\
+\x00\x0a\
+\x08\x4a\xc4\x07\
+\x00\x65\
+\x00\x78\x00\x70\x00\x61\x00\x6e\x00\x64\x00\x2e\x00\x73\x00\x76\x00\x67\
+\x00\x0e\
+\x09\xe9\x12\xe7\
+\x00\x73\
+\x00\x69\x00\x6d\x00\x70\x00\x6c\x00\x65\x00\x5f\x00\x62\x00\x6f\x00\x74\x00\x2e\x00\x73\x00\x76\x00\x67\
+\x00\x10\
+\x09\xed\xf9\x47\
+\x00\x61\
+\x00\x64\x00\x76\x00\x61\x00\x6e\x00\x63\x00\x65\x00\x64\x00\x5f\x00\x62\x00\x6f\x00\x74\x00\x2e\x00\x73\x00\x76\x00\x67\
+\x00\x0c\
+\x0a\xdc\x3f\xc7\
+\x00\x63\
+\x00\x6f\x00\x6c\x00\x6c\x00\x61\x00\x70\x00\x73\x00\x65\x00\x2e\x00\x73\x00\x76\x00\x67\
+\x00\x0d\
+\x0d\xb0\x10\x87\
+\x00\x63\
+\x00\x68\x00\x61\x00\x74\x00\x5f\x00\x69\x00\x63\x00\x6f\x00\x6e\x00\x2e\x00\x73\x00\x76\x00\x67\
+"
+
+qt_resource_struct_v1 = b"\
+\x00\x00\x00\x00\x00\x02\x00\x00\x00\x02\x00\x00\x00\x01\
+\x00\x00\x00\x00\x00\x02\x00\x00\x00\x05\x00\x00\x00\x04\
+\x00\x00\x00\x10\x00\x02\x00\x00\x00\x01\x00\x00\x00\x03\
+\x00\x00\x00\x22\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\
+\x00\x00\x00\x3a\x00\x00\x00\x00\x00\x01\x00\x00\x05\x89\
+\x00\x00\x00\x54\x00\x00\x00\x00\x00\x01\x00\x00\x06\x60\
+\x00\x00\x00\x76\x00\x00\x00\x00\x00\x01\x00\x00\x08\x1b\
+\x00\x00\x00\x9c\x00\x00\x00\x00\x00\x01\x00\x00\x0a\x2c\
+\x00\x00\x00\xba\x00\x00\x00\x00\x00\x01\x00\x00\x0b\x04\
+"
+
+qt_resource_struct_v2 = b"\
+\x00\x00\x00\x00\x00\x02\x00\x00\x00\x02\x00\x00\x00\x01\
+\x00\x00\x00\x00\x00\x00\x00\x00\
+\x00\x00\x00\x00\x00\x02\x00\x00\x00\x05\x00\x00\x00\x04\
+\x00\x00\x00\x00\x00\x00\x00\x00\
+\x00\x00\x00\x10\x00\x02\x00\x00\x00\x01\x00\x00\x00\x03\
+\x00\x00\x00\x00\x00\x00\x00\x00\
+\x00\x00\x00\x22\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\
+\x00\x00\x01\xa1\x53\xa7\xec\x84\
+\x00\x00\x00\x3a\x00\x00\x00\x00\x00\x01\x00\x00\x05\x89\
+\x00\x00\x01\xa1\x53\xa5\xd6\x65\
+\x00\x00\x00\x54\x00\x00\x00\x00\x00\x01\x00\x00\x06\x60\
+\x00\x00\x01\xa1\x53\xa5\xd6\x5b\
+\x00\x00\x00\x76\x00\x00\x00\x00\x00\x01\x00\x00\x08\x1b\
+\x00\x00\x01\xa1\x53\xa5\xd6\x5f\
+\x00\x00\x00\x9c\x00\x00\x00\x00\x00\x01\x00\x00\x0a\x2c\
+\x00\x00\x01\xa1\x53\xa5\xd6\x62\
+\x00\x00\x00\xba\x00\x00\x00\x00\x00\x01\x00\x00\x0b\x04\
+\x00\x00\x01\xa1\x53\xa5\xd6\x59\
+"
+
+qt_version = [int(v) for v in QtCore.qVersion().split('.')]
+if qt_version < [5, 8, 0]:
+    rcc_version = 1
+    qt_resource_struct = qt_resource_struct_v1
+else:
+    rcc_version = 2
+    qt_resource_struct = qt_resource_struct_v2
+
+def qInitResources():
+    QtCore.qRegisterResourceData(rcc_version, qt_resource_struct, qt_resource_name, qt_resource_data)
+
+def qCleanupResources():
+    QtCore.qUnregisterResourceData(rcc_version, qt_resource_struct, qt_resource_name, qt_resource_data)
+
+qInitResources()
@@ -0,0 +1,109 @@
+import time
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QLineEdit, QListWidget,
+                             QListWidgetItem, QLabel)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+from ui.workers import TaskWorker
+
+
+class SearchDialog(QDialog):
+    """Search across all saved conversations of the current user"""
+
+    result_selected = pyqtSignal(int, int)  # conversation id, message id
+
+    # Only this many of the newest matches are ranked, see ConversationStore.search
+    candidates = 200
+
+    def __init__(self, store, username, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.username = username
+        self.worker = None
+        self.search_pending = False
+
+        # Search once typing pauses, not on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.search)
+
+        self.init_ui()
+
+    def init_ui(self):
+        self.setWindowTitle("搜索对话")
+        self.setMinimumSize(500, 400)
+
+        layout = QVBoxLayout()
+
+        # Search field, results update while typing
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("输入关键词...")
+        self.search_edit.textChanged.connect(lambda: self.search_timer.start())
+        layout.addWidget(self.search_edit)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        # Result list, clicking a result jumps to the message
+        self.result_list = QListWidget()
+        self.result_list.setWordWrap(True)
+        self.result_list.itemClicked.connect(self.select_result)
+        layout.addWidget(self.result_list)
+
+        self.setLayout(layout)
+
+    def set_query(self, query):
+        """Fill in the search field and run the search"""
+        self.search_edit.setText(query)
+
+    def search(self):
+        """Search for the current text in a worker thread, one search at a time"""
+        if self.worker and self.worker.isRunning():
+            # Searched again with the latest text when this one finishes
+            self.search_pending = True
+            return
+
+        query = self.search_edit.text().strip()
+        if not query:
+            self.result_list.clear()
+            self.status_label.setText("")
+            return
+
+        self.worker = TaskWorker(self.run_search, query, parent=self)
+        self.worker.succeeded.connect(self.show_results)
+        self.worker.failed.connect(lambda error: self.status_label.setText(f"搜索失败: {error}"))
+        self.worker.finished.connect(self.on_search_finished)
+        self.worker.start()
+
+    def run_search(self, query):
+        """Runs in the worker thread"""
+        start = time.perf_counter()
+        results, complete = self.store.search(self.username, query, candidates=self.candidates)
+        return query, results, complete, (time.perf_counter() - start) * 1000
+
+    def on_search_finished(self):
+        if self.search_pending:
+            self.search_pending = False
+            self.search()
+
+    def show_results(self, outcome):
+        """Show ranked snippets, unless the text changed during the search"""
+        query, results, complete, elapsed_ms = outcome
+        if query != self.search_edit.text().strip():
+            return
+
+        self.result_list.clear()
+        for result in results:
+            speaker = "您" if result["role"] == "user" else "机器人"
+            item = QListWidgetItem(f"{result['title']} · {speaker}\n{result['snippet']}")
+            item.setData(Qt.UserRole, (result["conversation_id"], result["message_id"]))
+            self.result_list.addItem(item)
+
+        status = f"找到 {len(results)} 条结果（{elapsed_ms:.1f} 毫秒）"
+        if not complete:
+            status += f"，匹配过多，只在最近的 {self.candidates} 条匹配中排序"
+        self.status_label.setText(status)
+
+    def select_result(self, item):
+        conversation_id, message_id = item.data(Qt.UserRole)
+        self.result_selected.emit(conversation_id, message_id)
@@ -0,0 +1,33 @@
+"""Icons and the application stylesheet, compiled into ui/resources_rc.py
+
+Nothing is read from the working directory, so the app starts from any
+directory. After editing ui/resources/ regenerate the module with:
+
+    pyrcc5 ui/resources.qrc -o ui/resources_rc.py
+"""
+from PyQt5.QtCore import QFile, QTextStream
+from PyQt5.QtGui import QIcon
+
+from ui import resources_rc  # noqa: F401  Registers the ":/" resources
+
+_icons = {}
+
+
+def icon(name):
+    """Shared QIcon for ":/icons/<name>.svg", created on first use"""
+    cached = _icons.get(name)
+    if cached is None:
+        cached = _icons[name] = QIcon(f":/icons/{name}.svg")
+    return cached
+
+
+def bot_icon(use_advanced):
+    return icon("advanced_bot" if use_advanced else "simple_bot")
+
+
+def apply_stylesheet(app):
+    """Style every widget from one stylesheet, parsed once for the whole app"""
+    style_file = QFile(":/styles/style.qss")
+    style_file.open(QFile.ReadOnly | QFile.Text)
+    app.setStyleSheet(QTextStream(style_file).readAll())
+    style_file.close()
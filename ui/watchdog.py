@@ -0,0 +1,80 @@
+import logging
+import sys
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+
+from PyQt5.QtCore import QTimer
+
+
+class StallWatchdog(threading.Thread):
+    """Logs the main thread's stack whenever the Qt event loop stops responding
+
+    A QTimer on the main thread records a heartbeat; this thread checks it
+    and, when the main thread has been blocked longer than threshold seconds,
+    writes the main thread's Python stack to a rotating log file. The stall
+    duration is logged again once the event loop recovers.
+    """
+
+    def __init__(self, threshold=0.5, heartbeat_ms=50, log_path="stalls.log",
+                 max_bytes=1024 * 1024, backup_count=3):
+        super().__init__(daemon=True, name="StallWatchdog")
+        self.threshold = threshold
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.stall_count = 0
+        self.total_stall_time = 0.0
+        self._stop_event = threading.Event()
+
+        self.logger = logging.getLogger("chatbot.stalls")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            handler = RotatingFileHandler(log_path, maxBytes=max_bytes,
+                                          backupCount=backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.logger.addHandler(handler)
+
+        # Must be created on the main thread so it beats from the GUI event loop
+        self.heartbeat = QTimer()
+        self.heartbeat.timeout.connect(self.beat)
+        self.heartbeat.start(heartbeat_ms)
+
+    def beat(self):
+        self.last_beat = time.monotonic()
+
+    def stop(self):
+        self.heartbeat.stop()
+        self._stop_event.set()
+
+    def main_thread_stack(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return "(main thread stack unavailable)\n"
+        return "".join(traceback.format_stack(frame))
+
+    def run(self):
+        stalled_since = None
+        while not self._stop_event.wait(self.threshold / 4):
+            now = time.monotonic()
+            last_beat = self.last_beat
+            blocked = now - last_beat
+
+            if blocked > self.threshold and stalled_since != last_beat:
+                # New stall, capture where the main thread is stuck
+                stalled_since = last_beat
+                self.stall_count += 1
+                self.logger.warning(
+                    "stall #%d: main thread blocked for %.0f ms so far\n%s",
+                    self.stall_count, blocked * 1000, self.main_thread_stack()
+                )
+            elif stalled_since is not None and last_beat != stalled_since:
+                # The event loop is running again
+                duration = last_beat - stalled_since
+                self.total_stall_time += duration
+                self.logger.warning(
+                    "stall #%d ended after %.0f ms (%d stalls, %.1f s blocked in total)",
+                    self.stall_count, duration * 1000, self.stall_count, self.total_stall_time
+                )
+                stalled_since = None
@@ -0,0 +1,69 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class ResponseWorker(QThread):
+    """Runs a DS_Bot request off the GUI thread and streams the reply back"""
+
+    # Workers still running after their tab was closed, kept alive until done
+    detached = set()
+
+    chunk_received = pyqtSignal(str)  # Emitted for every streamed piece of the reply
+    response_ready = pyqtSignal(str, bool)  # Full reply and whether it was truncated
+
+    def __init__(self, bot, message, parent=None):
+        super().__init__(parent)
+        self.bot = bot
+        self.message = message
+        self.failed = False
+
+    def run(self):
+        try:
+            response = self.bot.get_response(self.message, stream=True,
+                                             on_chunk=self.chunk_received.emit)
+            self.failed = self.bot.last_error is not None
+            self.response_ready.emit(response, self.bot.last_truncated)
+        except Exception as e:
+            self.failed = True
+            self.response_ready.emit(f"错误: {str(e)}", False)
+
+    def cancel(self):
+        """Abort the running request, the partial reply is kept by the bot"""
+        self.bot.cancel()
+
+    def detach(self):
+        """Let the request finish after the owning tab is gone
+
+        A cancelled request keeps streaming while other tabs share its
+        result, so the thread must outlive the tab that started it.
+        """
+        self.setParent(None)
+        ResponseWorker.detached.add(self)
+        self.finished.connect(lambda: ResponseWorker.detached.discard(self))
+
+    @classmethod
+    def wait_detached(cls):
+        """Block until every detached worker is done
+
+        Qt aborts the process when a QThread is destroyed while it is
+        still running, so the application waits for them before exiting.
+        """
+        for worker in list(cls.detached):
+            worker.wait()
+
+
+class TaskWorker(QThread):
+    """Runs a long function off the GUI thread and reports its result"""
+
+    succeeded = pyqtSignal(object)  # Return value of the function
+    failed = pyqtSignal(str)  # Error message
+
+    def __init__(self, function, *args, parent=None):
+        super().__init__(parent)
+        self.function = function
+        self.args = args
+
+    def run(self):
+        try:
+            self.succeeded.emit(self.function(*self.args))
+        except Exception as e:
+            self.failed.emit(str(e))